@@ -0,0 +1,565 @@
+"""Offline benchmark for syria_environmental_data_aggregator.
+
+Starts a local stand-in for the Open-Meteo (forecast, archive and air quality),
+NASA POWER and World Bank climate APIs, points the aggregator at it through
+base URL overrides and reports wall time, requests/sec, peak RSS and
+per-stage CPU of run() for each scenario.
+Payloads are synthetic by default, or replayed from responses captured once
+with --record. Latency, 5xx errors and 429s can be injected.
+
+    python benchmark_environmental_aggregator.py --locations 500 --latency-ms 80 --error-rate 0.02
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import requests
+
+from syria_environmental_data_aggregator import (
+    MAJOR_CITIES, NASA_POWER_FILL_VALUE, NASA_POWER_PARAMETERS, NASA_POWER_URL, OPENMETEO_AIR_QUALITY_URL,
+    OPENMETEO_ARCHIVE_DAILY_VARIABLES, OPENMETEO_ARCHIVE_URL, OPENMETEO_CURRENT_VARIABLES,
+    OPENMETEO_FORECAST_DAILY_VARIABLES, OPENMETEO_FORECAST_URL, SYRIA_BBOX, DEFAULT_HOST_LIMITS, FALLBACK_HOST_LIMIT,
+    ResponseCache, SyriaEnvironmentalDataAggregator, parse_host_limits
+)
+
+WORLD_BANK_URL = "https://climateknowledgeportal.worldbank.org/api/v2/country"
+MOCKED_HOSTS = [urlparse(url).netloc for url in (OPENMETEO_FORECAST_URL, OPENMETEO_ARCHIVE_URL, OPENMETEO_AIR_QUALITY_URL,
+                                                  NASA_POWER_URL, WORLD_BANK_URL)]
+
+# Days at the end of a range the upstream reanalysis has not published yet
+ARCHIVE_LAG_DAYS = 5
+# Synthetic noise is drawn per calendar day counted from here, so overlapping ranges agree
+SERIES_EPOCH = date(1940, 1, 1)
+
+RECORDING_FILES = {
+    "forecast": "openmeteo_forecast.json",
+    "archive": "openmeteo_archive.json",
+    "nasa_power": "nasa_power.json",
+    "prcp": "world_bank_prcp.json",
+    "tas": "world_bank_tas.json"
+}
+
+# Slack allowed over the slowest host's floor before the hosts count as not overlapping
+OVERLAP_TOLERANCE = 1.25
+OVERLAP_SLACK_SECONDS = 0.5
+
+# name -> aggregator settings; "warm_cache" runs once untimed so the timed run hits the cache
+SCENARIOS = {
+    "serial": {"max_workers": 1, "batch_size": 1},
+    "concurrent": {"max_workers": 8, "batch_size": 1},
+    "batched": {"max_workers": 8, "batch_size": 50},
+    "cached": {"max_workers": 8, "batch_size": 50, "warm_cache": True}
+}
+
+
+def record_responses(directory: str):
+    """Capture one live response per endpoint (for Damascus) to replay in the mock server"""
+    os.makedirs(directory, exist_ok=True)
+    lat, lon = MAJOR_CITIES["Damascus"]["lat"], MAJOR_CITIES["Damascus"]["lon"]
+    end = date.today() - timedelta(days=1)
+    requests_to_record = {
+        "forecast": (OPENMETEO_FORECAST_URL, {
+            "latitude": lat, "longitude": lon, "current": OPENMETEO_CURRENT_VARIABLES,
+            "daily": OPENMETEO_FORECAST_DAILY_VARIABLES, "timezone": "auto"
+        }),
+        "archive": (OPENMETEO_ARCHIVE_URL, {
+            "latitude": lat, "longitude": lon, "start_date": (end - timedelta(days=365)).isoformat(),
+            "end_date": end.isoformat(), "daily": OPENMETEO_ARCHIVE_DAILY_VARIABLES, "timezone": "auto"
+        }),
+        "nasa_power": (NASA_POWER_URL, {
+            "parameters": NASA_POWER_PARAMETERS, "community": "RE", "longitude": f"{lon:.2f}",
+            "latitude": f"{lat:.2f}", "start": (end - timedelta(days=365)).strftime("%Y%m%d"),
+            "end": end.strftime("%Y%m%d"), "format": "JSON"
+        }),
+        "prcp": (f"{WORLD_BANK_URL}/SYR/prcp/data.json", None),
+        "tas": (f"{WORLD_BANK_URL}/SYR/tas/data.json", None)
+    }
+
+    for name, (url, params) in requests_to_record.items():
+        try:
+            response = requests.get(url, params=params, timeout=120)
+            response.raise_for_status()
+            with open(os.path.join(directory, RECORDING_FILES[name]), "w", encoding="utf-8") as f:
+                json.dump(response.json(), f)
+            print(f"Recorded {name}: {len(response.content)} bytes")
+        except Exception as e:
+            print(f"Could not record {name}: {e}")
+
+
+class ResponseLibrary:
+    """Builds mock payloads shaped like the real APIs' for any location and date range.
+
+    With recordings, the recorded series are cycled over the requested dates and
+    stamped with the requested coordinates; otherwise values are synthesized from
+    a seasonal cycle plus noise seeded by the coordinates, so runs are repeatable.
+    """
+
+    def __init__(self, recordings: Optional[str] = None):
+        self.recorded = {}
+        if recordings:
+            for name, filename in RECORDING_FILES.items():
+                path = os.path.join(recordings, filename)
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as f:
+                        self.recorded[name] = json.load(f)
+            print(f"Replaying recorded responses: {sorted(self.recorded)}")
+
+    def rng(self, lat: float, lon: float, salt: str) -> np.random.Generator:
+        return np.random.default_rng(zlib.crc32(f"{lat:.4f},{lon:.4f},{salt}".encode()))
+
+    def daily_draws(self, lat: float, lon: float, salt: str, days: List[date],
+                    draw: Callable[[np.random.Generator, int], np.ndarray]) -> np.ndarray:
+        """Random values tied to calendar days: a day gets the same value whatever range it is requested in"""
+        offsets = np.array([(day - SERIES_EPOCH).days for day in days], dtype=np.int64)
+        if not len(offsets):
+            return np.zeros(0)
+        return draw(self.rng(lat, lon, salt), int(offsets.max()) + 1)[offsets]
+
+    def series(self, variable: str, days: List[date], lat: float, lon: float) -> np.ndarray:
+        """Plausible daily values for one variable at one location"""
+        season = np.sin(2 * np.pi * (np.array([day.timetuple().tm_yday for day in days]) - 110) / 365.25)
+        noise = self.daily_draws(lat, lon, variable, days, lambda rng, count: rng.normal(0, 1, count))
+        mean_temp = 18 + 10 * season - 1.2 * (lat - 33.5) + 2 * noise
+        name = variable.lower()
+        if "snow" in name:
+            return np.zeros(len(days))
+        if "precip" in name or name.startswith("rain") or name == "showers":
+            wet = self.daily_draws(lat, lon, variable + " wet", days, lambda rng, count: rng.random(count)) < 0.25 * (1 - season)
+            amount = self.daily_draws(lat, lon, variable + " amount", days, lambda rng, count: rng.gamma(1.5, 4, count))
+            return np.where(wet, amount, 0.0)
+        if "max" in name and ("temp" in name or name.startswith("t2m")):
+            return mean_temp + 6
+        if "min" in name and ("temp" in name or name.startswith("t2m")):
+            return mean_temp - 6
+        if "temp" in name or name == "t2m":
+            return mean_temp
+        if "humidity" in name or name == "rh2m":
+            return np.clip(55 - 20 * season + 8 * noise, 5, 100)
+        if "wind" in name or name.startswith("ws"):
+            return np.abs(15 + 5 * noise)
+        if "et0" in name:
+            return np.clip(4 + 2.5 * season + 0.5 * noise, 0, None)
+        if "pressure" in name:
+            return 1013 - 5 * season + 2 * noise
+        return np.abs(10 + 3 * noise)
+
+    def cycled(self, values: List[Any], count: int) -> List[Any]:
+        return [values[i % len(values)] for i in range(count)] if values else [None] * count
+
+    def forecast(self, lat: float, lon: float) -> Dict[str, Any]:
+        if "forecast" in self.recorded:
+            return {**self.recorded["forecast"], "latitude": lat, "longitude": lon}
+        today = date.today()
+        days = [today + timedelta(days=i) for i in range(7)]
+        current = {variable: round(float(self.series(variable, [today], lat, lon)[0]), 1)
+                   for variable in OPENMETEO_CURRENT_VARIABLES.split(",")}
+        current.update({"weather_code": int(self.rng(lat, lon, "code").choice([0, 1, 2, 3, 61])), "is_day": 1})
+        daily = {"time": [day.isoformat() for day in days]}
+        for variable in OPENMETEO_FORECAST_DAILY_VARIABLES.split(","):
+            if variable in ("sunrise", "sunset"):
+                daily[variable] = [f"{day.isoformat()}T{'05:45' if variable == 'sunrise' else '18:10'}" for day in days]
+            else:
+                daily[variable] = np.round(self.series(variable, days, lat, lon), 1).tolist()
+        return {"latitude": lat, "longitude": lon, "current": current, "daily": daily}
+
+    def hourly(self, lat: float, lon: float, variables: List[str], past_hours: int, forecast_hours: int) -> Dict[str, Any]:
+        """Hourly UTC series around the current hour: a diurnal cycle plus noise per variable"""
+        now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        times = [now + timedelta(hours=offset) for offset in range(-past_hours, forecast_hours)]
+        diurnal = np.sin(2 * np.pi * (np.array([moment.hour for moment in times]) - 9) / 24)
+        hourly = {"time": [moment.strftime("%Y-%m-%dT%H:%M") for moment in times]}
+        for variable in variables:
+            noise = self.rng(lat, lon, "hourly " + variable).normal(0, 1, len(times))
+            if variable == "temperature_2m":
+                values = self.series(variable, [now.date()], lat, lon)[0] + 7 * diurnal + noise
+            elif variable == "relative_humidity_2m":
+                values = np.clip(50 - 20 * diurnal + 5 * noise, 5, 100)
+            elif variable == "precipitation":
+                values = np.where(noise > 2, noise - 2, 0.0)
+            elif variable == "wind_speed_10m":
+                values = np.abs(3 + 2 * diurnal + noise)
+            elif variable == "boundary_layer_height":
+                values = np.clip(800 + 900 * diurnal + 100 * noise, 50, None)
+            elif variable == "ozone":
+                values = np.abs(80 + 40 * diurnal + 10 * noise)
+            else:
+                values = np.abs((60 if variable == "pm10" else 15) * (1 - 0.3 * diurnal) + 4 * noise)
+            hourly[variable] = np.round(values, 1).tolist()
+        return {"latitude": lat, "longitude": lon, "hourly": hourly}
+
+    def archive(self, lat: float, lon: float, start: str, end: str, variables: List[str]) -> Dict[str, Any]:
+        first = date.fromisoformat(start)
+        days = [first + timedelta(days=i) for i in range((date.fromisoformat(end) - first).days + 1)]
+        published = sum(day <= date.today() - timedelta(days=ARCHIVE_LAG_DAYS) for day in days)
+        daily = {"time": [day.isoformat() for day in days]}
+        recorded = self.recorded.get("archive", {}).get("daily")
+        for variable in variables:
+            if recorded:
+                values = self.cycled([value for value in recorded.get(variable, []) if value is not None], published)
+            else:
+                values = np.round(self.series(variable, days[:published], lat, lon), 1).tolist()
+            daily[variable] = values + [None] * (len(days) - published)
+        return {"latitude": lat, "longitude": lon, "daily": daily}
+
+    def nasa_power(self, lat: float, lon: float, start: str, end: str, parameters: List[str]) -> Dict[str, Any]:
+        first = datetime.strptime(start, "%Y%m%d").date()
+        days = [first + timedelta(days=i) for i in range((datetime.strptime(end, "%Y%m%d").date() - first).days + 1)]
+        published = sum(day <= date.today() - timedelta(days=ARCHIVE_LAG_DAYS) for day in days)
+        recorded = self.recorded.get("nasa_power", {}).get("properties", {}).get("parameter")
+        series = {}
+        for parameter in parameters:
+            if recorded:
+                values = self.cycled([value for value in recorded.get(parameter, {}).values()
+                                      if value != NASA_POWER_FILL_VALUE], published)
+            else:
+                values = np.round(self.series(parameter, days[:published], lat, lon), 2).tolist()
+            values += [NASA_POWER_FILL_VALUE] * (len(days) - published)
+            series[parameter] = {day.strftime("%Y%m%d"): value for day, value in zip(days, values)}
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "header": {"fill_value": NASA_POWER_FILL_VALUE},
+            "properties": {"parameter": series}
+        }
+
+    def world_bank(self, variable: str) -> Any:
+        if variable in self.recorded:
+            return self.recorded[variable]
+        years = range(1901, date.today().year)
+        base = 320.0 if variable == "prcp" else 17.5
+        return {"SYR": {str(year): round(base + (year - 1960) * 0.01, 2) for year in years}}
+
+
+class MockClimateServer:
+    """Threaded local HTTP server answering /<upstream host>/<path> like the real services.
+
+    Each request waits latency_ms (+/- jitter_ms), then fails with a 503 at
+    error_rate or a 429 (with Retry-After) at throttle_rate, else returns the
+    payload. World Bank responses carry an ETag and honour If-None-Match.
+    """
+
+    def __init__(self, library: ResponseLibrary, latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0, throttle_rate: float = 0, retry_after: int = 1):
+        self.library = library
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.reset_counters()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_urls(self) -> Dict[str, str]:
+        port = self.httpd.server_address[1]
+        return {host: f"http://127.0.0.1:{port}/{host}" for host in MOCKED_HOSTS}
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_counters(self):
+        with self.lock:
+            self.counters = {"requests": 0, "bytes": 0, "status": {}}
+
+    def count(self, status: int, size: int):
+        with self.lock:
+            self.counters["requests"] += 1
+            self.counters["bytes"] += size
+            self.counters["status"][str(status)] = self.counters["status"].get(str(status), 0) + 1
+
+    def handle(self, request: BaseHTTPRequestHandler):
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        roll = random.random()
+        if roll < self.error_rate:
+            return self.respond(request, 503, {"error": "injected failure"})
+        if roll < self.error_rate + self.throttle_rate:
+            return self.respond(request, 429, {"error": "injected rate limit"}, {"Retry-After": str(self.retry_after)})
+
+        parsed = urlparse(request.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        try:
+            payload, headers = self.payload(parsed.path, params)
+        except (KeyError, ValueError) as e:
+            return self.respond(request, 400, {"error": f"bad request: {e}"})
+        if payload is None:
+            return self.respond(request, 404, {"error": "unknown endpoint"})
+        if headers.get("ETag") and request.headers.get("If-None-Match") == headers["ETag"]:
+            return self.respond(request, 304, None, headers)
+        self.respond(request, 200, payload, headers)
+
+    def payload(self, path: str, params: Dict[str, str]) -> Tuple[Any, Dict[str, str]]:
+        host, _, endpoint = path.lstrip("/").partition("/")
+        if host == urlparse(WORLD_BANK_URL).netloc:
+            variable = endpoint.split("/")[-2]
+            return self.library.world_bank(variable), {"ETag": f'"{variable}-v1"'}
+
+        if "/" + endpoint == urlparse(NASA_POWER_URL).path:
+            return self.library.nasa_power(
+                float(params["latitude"]), float(params["longitude"]),
+                params["start"], params["end"], params["parameters"].split(",")
+            ), {}
+
+        lats = [float(value) for value in params["latitude"].split(",")]
+        lons = [float(value) for value in params["longitude"].split(",")]
+        if "hourly" in params:
+            results = [self.library.hourly(lat, lon, params["hourly"].split(","), int(params.get("past_hours", 0)),
+                                           int(params.get("forecast_hours", 24)))
+                       for lat, lon in zip(lats, lons)]
+        elif "/" + endpoint == urlparse(OPENMETEO_FORECAST_URL).path and host == urlparse(OPENMETEO_FORECAST_URL).netloc:
+            results = [self.library.forecast(lat, lon) for lat, lon in zip(lats, lons)]
+        elif "/" + endpoint == urlparse(OPENMETEO_ARCHIVE_URL).path:
+            results = [self.library.archive(lat, lon, params["start_date"], params["end_date"], params["daily"].split(","))
+                       for lat, lon in zip(lats, lons)]
+        else:
+            return None, {}
+        return (results if len(results) > 1 else results[0]), {}
+
+    def respond(self, request: BaseHTTPRequestHandler, status: int, payload: Any,
+                headers: Optional[Dict[str, str]] = None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(body)
+        self.count(status, len(body))
+
+
+def synthetic_locations(count: int, seed: int = 0) -> Callable[[], Iterator[Tuple[str, Dict]]]:
+    """Location source of count random points inside the Syria bounding box"""
+    def locations() -> Iterator[Tuple[str, Dict]]:
+        rng = random.Random(seed)
+        min_lat, min_lon, max_lat, max_lon = SYRIA_BBOX
+        for index in range(count):
+            lat, lon = round(rng.uniform(min_lat, max_lat), 4), round(rng.uniform(min_lon, max_lon), 4)
+            yield f"synthetic-{index:05d}", {"lat": lat, "lon": lon, "population": None}
+    return locations
+
+
+def run_scenario(settings: Dict[str, Any], workdir: str, results: multiprocessing.Queue, go: multiprocessing.Event):
+    """Child process: build an aggregator against the mock server, run it and report measurements.
+
+    The warm-up run (if any) happens before signalling "ready"; the timed run
+    waits for go so the parent can reset the server counters in between.
+    """
+    def build() -> SyriaEnvironmentalDataAggregator:
+        aggregator = SyriaEnvironmentalDataAggregator(
+            max_workers=settings["max_workers"],
+            batch_size=settings["batch_size"],
+            host_limits=settings["host_limits"],
+            max_retries=settings["max_retries"],
+            output_file=os.path.join(workdir, "report.json"),
+            output_format="json-stream",
+            cache=ResponseCache(os.path.join(workdir, "cache.sqlite")) if settings.get("warm_cache") else None,
+            base_urls=settings["base_urls"],
+            hourly_hours=settings["hourly_hours"]
+        )
+        # The synthetic locations stand in for the governorate list rather than coming from a
+        # location source, so each scenario takes the same code path as the nightly job
+        # (process_cities_serially for "serial")
+        aggregator.major_cities = dict(synthetic_locations(settings["locations"], settings["seed"])())
+        aggregator.reset_report(len(aggregator.major_cities))
+        return aggregator
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if settings.get("warm_cache"):
+            build().run()
+        aggregator = build()
+        results.put({"event": "ready"})
+        go.wait()
+        started, cpu_started = time.perf_counter(), time.process_time()
+        aggregator.run()
+        wall, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+    snapshot = aggregator.metrics.snapshot()
+    results.put({
+        "event": "finished",
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages_seconds": snapshot["stages_seconds"],
+        "stages_cpu_seconds": snapshot["stages_cpu_seconds"],
+        "endpoints": snapshot["endpoints"],
+        "locations": aggregator.cities_emitted,
+        "report_bytes": aggregator.writer.size
+    })
+
+
+def benchmark(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Run each requested scenario in a fresh process against one mock server"""
+    server = MockClimateServer(
+        ResponseLibrary(args.recordings),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after
+    )
+    server.start()
+    context = multiprocessing.get_context("spawn")
+    results = []
+
+    try:
+        for name in args.scenarios:
+            settings = {
+                **SCENARIOS[name],
+                "locations": args.locations,
+                "seed": args.seed,
+                "max_retries": args.max_retries,
+                "hourly_hours": args.hourly_outlook,
+                "host_limits": parse_host_limits(args.host_limit) or None,
+                "base_urls": server.base_urls
+            }
+            print(f"Running scenario '{name}' ({args.locations} locations)...")
+            with tempfile.TemporaryDirectory() as workdir:
+                queue, go = context.Queue(), context.Event()
+                process = context.Process(target=run_scenario, args=(settings, workdir, queue, go))
+                process.start()
+                queue.get()
+                server.reset_counters()
+                go.set()
+                measured = queue.get()
+                process.join()
+
+            counters = dict(server.counters)
+            results.append({
+                "scenario": name,
+                **{key: value for key, value in SCENARIOS[name].items()},
+                **{key: value for key, value in measured.items() if key != "event"},
+                "server_requests": counters["requests"],
+                "server_bytes": counters["bytes"],
+                "server_status": counters["status"],
+                "requests_per_second": round(counters["requests"] / measured["wall_seconds"], 1)
+            })
+    finally:
+        server.stop()
+
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]):
+    stages = sorted({stage for result in results for stage in result["stages_cpu_seconds"]})
+    header = f"{'scenario':<12}{'wall s':>9}{'req':>7}{'req/s':>8}{'RSS MB':>9}" + "".join(
+        f"{stage + ' cpu':>18}" for stage in stages
+    )
+    print(f"\n{header}\n{'-' * len(header)}")
+    for result in results:
+        print(f"{result['scenario']:<12}{result['wall_seconds']:>9.2f}{result['server_requests']:>7}"
+              f"{result['requests_per_second']:>8.1f}{result['peak_rss_mb']:>9.1f}" + "".join(
+                  f"{result['stages_cpu_seconds'].get(stage, 0):>18.3f}" for stage in stages
+              ))
+
+
+def host_floor_seconds(result: Dict[str, Any], host_limits: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Shortest time each host's requests of a run could take within its limits.
+
+    A host needs at least its requests over its rate (after the burst), and its
+    total request time spread over its usable concurrency.
+    """
+    requests_by_host, seconds_by_host = {}, {}
+    for endpoint, stats in result["endpoints"].items():
+        host = endpoint.split("/", 1)[0]
+        requests_by_host[host] = requests_by_host.get(host, 0) + stats["requests"]
+        seconds_by_host[host] = seconds_by_host.get(host, 0.0) + stats["request_seconds"]
+    floors = {}
+    for host, count in requests_by_host.items():
+        limit = host_limits.get(host, FALLBACK_HOST_LIMIT)
+        concurrency = min(int(limit["concurrency"]), result["max_workers"])
+        floors[host] = max(max(0, count - int(limit.get("burst", 1))) / limit["rate"], seconds_by_host[host] / concurrency)
+    return floors
+
+
+def assert_hosts_overlap(results: List[Dict[str, Any]], host_limits: Dict[str, Dict[str, float]]):
+    """Multi-worker fetches must take about as long as the slowest host, not the sum of the hosts"""
+    serial = next((result for result in results if result["scenario"] == "serial"), None)
+    for result in results:
+        if result["max_workers"] == 1 or result.get("warm_cache"):
+            continue
+        floors = host_floor_seconds(result, host_limits)
+        if not floors:
+            continue
+        slowest = max(floors.values())
+        fetch = result["stages_seconds"].get("fetch", 0.0)
+        saving = f"; serial fetch took {serial['stages_seconds'].get('fetch', 0.0):.2f}s" if serial else ""
+        print(f"{result['scenario']}: fetch {fetch:.2f}s, slowest host floor {slowest:.2f}s, "
+              f"sum of host floors {sum(floors.values()):.2f}s{saving}")
+        assert fetch <= slowest * OVERLAP_TOLERANCE + OVERLAP_SLACK_SECONDS, (
+            f"{result['scenario']}: fetching took {fetch:.2f}s against a {slowest:.2f}s floor for the slowest host; "
+            "the hosts are not being fetched in parallel"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the aggregator offline against a local mock of its APIs")
+    parser.add_argument("--locations", type=int, default=100, help="Number of synthetic locations")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic locations")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS),
+                        help="Scenarios to run, in order")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Injected latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=10, help="Random +/- variation of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--max-retries", type=int, default=3, help="Aggregator retries per request")
+    parser.add_argument("--hourly-outlook", type=int, nargs="?", const=72, metavar="HOURS",
+                        help="Also fetch and analyze the hourly air quality and heat stress outlook")
+    parser.add_argument("--host-limit", action="append", default=[], metavar="HOST=CONCURRENCY:RATE",
+                        help="Override the aggregator's per-host limits, keyed by the real host (repeatable)")
+    parser.add_argument("--recordings", metavar="DIR", help="Replay responses recorded with --record from DIR")
+    parser.add_argument("--record", metavar="DIR", help="Record one live response per endpoint into DIR and exit")
+    parser.add_argument("--output", metavar="PATH", help="Also write the results as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.record:
+        record_responses(args.record)
+    else:
+        results = benchmark(args)
+        print_results(results)
+        if not (args.error_rate or args.throttle_rate):
+            assert_hosts_overlap(results, {**DEFAULT_HOST_LIMITS, **parse_host_limits(args.host_limit)})
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"settings": vars(args), "results": results}, f, indent=2)
+            print(f"\nResults written to {args.output}")
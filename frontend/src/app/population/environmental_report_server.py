@@ -0,0 +1,285 @@
+"""Local HTTP query API over the environmental data report.
+
+Serves small slices of syria_environmental_data_report.json instead of the
+whole document, from an in-memory index by location and by metric:
+
+    GET /summary                      summary and metadata
+    GET /country                      country-level section
+    GET /metrics                      rankable metric and selectable field names
+    GET /cities                       names and coordinates
+    GET /cities/<name>                one location's full record
+    GET /bbox?south=&west=&north=&east=[&fields=a,b]
+    GET /top?metric=drought_risk[&n=10][&order=asc|desc]
+
+Every response carries an ETag derived from the report's content and is
+answered with 304 when the client's If-None-Match still matches. The report
+file is watched and re-indexed when a new one is written (the daemon mode and
+atomic writers replace it in one rename).
+
+    python environmental_report_server.py --report syria_environmental_data_report.json --port 8765
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlparse, parse_qs, unquote
+
+import numpy as np
+
+from syria_environmental_data_aggregator import COMPACT_REPORT_COLUMNS, iter_report_records, normalize_location_name
+
+# Ordinal ranks for string metrics that can be ranked
+CATEGORY_RANKS = {
+    "drought_risk": {"Moderate": 1, "High": 2, "Very High": 3}
+}
+
+# Responses smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    """Read a report written as one JSON document or as JSON lines, whatever its file name.
+
+    The summary is written last in both formats, so a report without one is a
+    run still in progress and raises ValueError.
+    """
+    report = {"cities": {}}
+    for record in iter_report_records(path):
+        if record["type"] == "city":
+            report["cities"][record["name"]] = record["data"]
+        else:
+            report[record["type"]] = record["data"]
+    if "summary" not in report:
+        raise ValueError("report has no summary yet")
+    return report
+
+
+class ReportIndex:
+    """Immutable in-memory index of one report: records by name, coordinates and metric columns"""
+
+    def __init__(self, report: Dict[str, Any], version: str):
+        self.version = version
+        self.metadata = report.get("metadata", {})
+        self.summary = report.get("summary", {})
+        self.country_level = report.get("country_level", {})
+        self.records = report.get("cities", {})
+        self.names = list(self.records)
+        self.rows = {name: row for row, name in enumerate(self.names)}
+        self.lookup = {normalize_location_name(name): name for name in self.names}
+        self.fields = {column: (section, key) for column, section, key in COMPACT_REPORT_COLUMNS}
+
+        self.metrics = {}
+        for column, section, key in COMPACT_REPORT_COLUMNS:
+            values = [(record.get(section) or {}).get(key) if section else record.get(key)
+                      for record in self.records.values()]
+            if column in CATEGORY_RANKS:
+                values = [CATEGORY_RANKS[column].get(value) for value in values]
+            elif any(isinstance(value, str) for value in values):
+                continue
+            self.metrics[column] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        self.lats = self.metrics.get("lat", np.full(len(self.names), np.nan))
+        self.lons = self.metrics.get("lon", np.full(len(self.names), np.nan))
+
+    def find(self, name: str) -> Optional[str]:
+        return name if name in self.records else self.lookup.get(normalize_location_name(name))
+
+    def in_bbox(self, south: float, west: float, north: float, east: float) -> List[str]:
+        inside = (self.lats >= south) & (self.lats <= north) & (self.lons >= west) & (self.lons <= east)
+        return [self.names[row] for row in np.flatnonzero(inside)]
+
+    def top(self, metric: str, n: int, descending: bool = True) -> List[Tuple[str, float]]:
+        """The n locations with the highest (or lowest) value of a metric, skipping missing values"""
+        values = self.metrics[metric]
+        rows = np.flatnonzero(~np.isnan(values))
+        if len(rows) > n:
+            # Partial selection first, so only n values are fully sorted
+            keys = -values[rows] if descending else values[rows]
+            rows = rows[np.argpartition(keys, n - 1)[:n]]
+        rows = rows[np.argsort(-values[rows] if descending else values[rows], kind="stable")]
+        return [(self.names[row], values[row]) for row in rows]
+
+    def metric_value(self, metric: str, row: int) -> Any:
+        """A metric as stored in the report (category names rather than ranks)"""
+        section, key = self.fields[metric]
+        record = self.records[self.names[row]]
+        return (record.get(section) or {}).get(key) if section else record.get(key)
+
+
+class ReportStore:
+    """Holds the current ReportIndex and swaps in a new one when the report file changes.
+
+    A file that fails to parse or has no summary yet (a streaming or JSON lines
+    writer still mid-run) keeps the previous index in service until a complete
+    report appears.
+    """
+
+    def __init__(self, path: str, reload_seconds: float = 1.0):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self.index = None
+        self.stamp = None
+        self.stopping = threading.Event()
+        self.reload()
+
+    def reload(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if stamp == self.stamp:
+            return False
+
+        try:
+            with open(self.path, "rb") as f:
+                version = hashlib.sha1(f.read()).hexdigest()[:16]
+            if self.index is not None and version == self.index.version:
+                self.stamp = stamp
+                return False
+            index = ReportIndex(load_report(self.path), version)
+        except (ValueError, KeyError, OSError) as e:
+            # Retried when the file changes again
+            self.stamp = stamp
+            print(f"Report not loadable yet, keeping the previous one: {e}")
+            return False
+
+        self.index, self.stamp = index, stamp
+        print(f"Loaded report {version} ({len(index.names)} locations)")
+        return True
+
+    def watch(self):
+        while not self.stopping.wait(self.reload_seconds):
+            self.reload()
+
+
+class ReportQueryHandler(BaseHTTPRequestHandler):
+    """Routes GET requests to the current index; the store is attached to the server"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        index = self.server.store.index
+        if index is None:
+            return self.respond(503, {"error": "no report loaded yet"})
+
+        parsed = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        parts = [unquote(part) for part in parsed.path.strip("/").split("/") if part]
+        try:
+            status, body = self.route(index, parts, params)
+        except (KeyError, ValueError) as e:
+            status, body = 400, {"error": f"bad request: {e}"}
+
+        etag = '"' + hashlib.sha1(f"{index.version}|{self.path}".encode("utf-8")).hexdigest()[:20] + '"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            return self.respond(304, None, etag)
+        self.respond(status, body, etag if status == 200 else None)
+
+    def route(self, index: ReportIndex, parts: List[str], params: Dict[str, str]) -> Tuple[int, Any]:
+        if parts == ["summary"]:
+            return 200, {"metadata": index.metadata, "summary": index.summary}
+        if parts == ["country"]:
+            return 200, index.country_level
+        if parts == ["metrics"]:
+            return 200, {"metrics": list(index.metrics), "fields": list(index.fields), "ranked_categories": CATEGORY_RANKS}
+        if parts == ["cities"]:
+            return 200, {"count": len(index.names), "cities": [
+                {"name": name, "lat": lat, "lon": lon}
+                for name, lat, lon in zip(index.names, index.lats.tolist(), index.lons.tolist())
+            ]}
+        if len(parts) == 2 and parts[0] == "cities":
+            name = index.find(parts[1])
+            if name is None:
+                return 404, {"error": f"unknown location {parts[1]!r}"}
+            return 200, {"name": name, **index.records[name]}
+        if parts == ["bbox"]:
+            names = index.in_bbox(float(params["south"]), float(params["west"]),
+                                  float(params["north"]), float(params["east"]))
+            fields = params["fields"].split(",") if params.get("fields") else None
+            if fields is None:
+                return 200, {"count": len(names), "cities": {name: index.records[name] for name in names}}
+            unknown = [field for field in fields if field not in index.fields]
+            if unknown:
+                return 400, {"error": f"unknown fields {unknown}", "fields": list(index.fields)}
+            return 200, {"count": len(names), "cities": {
+                name: {field: index.metric_value(field, index.rows[name]) for field in fields} for name in names
+            }}
+        if parts == ["top"]:
+            metric = params["metric"]
+            if metric not in index.metrics:
+                return 404, {"error": f"unknown metric {metric!r}", "metrics": list(index.metrics)}
+            n = int(params.get("n", 10))
+            if n < 1:
+                return 400, {"error": f"n must be at least 1, got {n}"}
+            ranked = index.top(metric, n, params.get("order", "desc") != "asc")
+            return 200, {"metric": metric, "results": [
+                {"name": name, "value": index.metric_value(metric, index.rows[name])} for name, _ in ranked
+            ]}
+        return 404, {"error": "not found"}
+
+    def respond(self, status: int, payload: Any, etag: Optional[str] = None):
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        compress = len(body) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", "")
+        if compress:
+            body = gzip.compress(body, compresslevel=6)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Vary", "Accept-Encoding")
+        if etag:
+            self.send_header("ETag", etag)
+        if self.server.cors_origin:
+            self.send_header("Access-Control-Allow-Origin", self.server.cors_origin)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def serve(report_path: str, host: str = "127.0.0.1", port: int = 8765, reload_seconds: float = 1.0,
+          cors_origin: Optional[str] = None, verbose: bool = False) -> ThreadingHTTPServer:
+    """Start the query server and its report watcher on background threads"""
+    store = ReportStore(report_path, reload_seconds)
+    server = ThreadingHTTPServer((host, port), ReportQueryHandler)
+    server.daemon_threads = True
+    server.store = store
+    server.cors_origin = cors_origin
+    server.verbose = verbose
+    threading.Thread(target=store.watch, daemon=True).start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve per-city and aggregated slices of the environmental report")
+    parser.add_argument("--report", default="syria_environmental_data_report.json",
+                        help="Report to serve (JSON or JSON lines)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--reload-seconds", type=float, default=1.0, help="How often to check the report for changes")
+    parser.add_argument("--cors-origin", help="Send Access-Control-Allow-Origin with this value")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = serve(args.report, args.host, args.port, args.reload_seconds, args.cors_origin, args.verbose)
+    print(f"Serving {args.report} on http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -2,110 +2,1860 @@
 
 import requests
 import json
+import math
+import multiprocessing
+import argparse
+import bisect
+import cProfile
+import csv
+import gzip
+import hashlib
+import io
+import os
+import pstats
+import random
+import shutil
+import signal
+import sqlite3
+import sys
+import threading
+import tracemalloc
+import unicodedata
+import warnings
+import zlib
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from itertools import islice, zip_longest
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 import time
 
-class SyriaEnvironmentalDataAggregator:
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# Per-host request limits: max in-flight requests and sustained requests/second
+DEFAULT_HOST_LIMITS = {
+    "api.open-meteo.com": {"concurrency": 8, "rate": 8.0, "burst": 8},
+    "archive-api.open-meteo.com": {"concurrency": 4, "rate": 4.0, "burst": 4},
+    "power.larc.nasa.gov": {"concurrency": 4, "rate": 4.0, "burst": 4},
+    "climateknowledgeportal.worldbank.org": {"concurrency": 2, "rate": 2.0, "burst": 2},
+    "air-quality-api.open-meteo.com": {"concurrency": 4, "rate": 4.0, "burst": 4},
+}
+FALLBACK_HOST_LIMIT = {"concurrency": 2, "rate": 2.0, "burst": 2}
+
+OPENMETEO_FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+OPENMETEO_ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+OPENMETEO_CURRENT_VARIABLES = "temperature_2m,relative_humidity_2m,apparent_temperature,is_day,precipitation,rain,showers,snowfall,weather_code,cloud_cover,pressure_msl,surface_pressure,wind_speed_10m,wind_direction_10m,wind_gusts_10m"
+OPENMETEO_FORECAST_DAILY_VARIABLES = "temperature_2m_max,temperature_2m_min,temperature_2m_mean,apparent_temperature_max,apparent_temperature_min,sunrise,sunset,daylight_duration,sunshine_duration,precipitation_sum,rain_sum,precipitation_hours,wind_speed_10m_max,wind_gusts_10m_max,wind_direction_10m_dominant"
+OPENMETEO_ARCHIVE_DAILY_VARIABLES = "temperature_2m_max,temperature_2m_min,temperature_2m_mean,precipitation_sum,wind_speed_10m_max,et0_fao_evapotranspiration,surface_pressure_mean"
+OPENMETEO_HOURLY_VARIABLES = "temperature_2m,relative_humidity_2m,precipitation,wind_speed_10m,boundary_layer_height"
+OPENMETEO_AIR_QUALITY_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
+OPENMETEO_AIR_QUALITY_VARIABLES = "pm2_5,pm10,ozone"
+NASA_POWER_URL = "https://power.larc.nasa.gov/api/temporal/daily/point"
+NASA_POWER_PARAMETERS = "T2M_MAX,T2M_MIN,T2M,RH2M,PRECTOTCORR,WS10M"
+NASA_POWER_FILL_VALUE = -999
+
+# First year covered by the Open-Meteo (ERA5) archive
+OPENMETEO_ARCHIVE_FIRST_YEAR = 1940
+# Most recent years compared against the climatology baseline for precipitation anomalies
+CLIMATOLOGY_RECENT_YEARS = 5
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Hourly outlook: hours of history fetched ahead of the track so every rolling window is full
+HOURLY_WARMUP_HOURS = 24
+# US EPA AQI breakpoints as (concentration, index) pairs, with the averaging window in hours;
+# PM in ug/m3 (2024 PM2.5 revision), ozone in ppb (Open-Meteo reports ug/m3, converted at 25 C)
+AQI_BREAKPOINTS = {
+    "pm2_5": (24, [0, 9.0, 9.1, 35.4, 35.5, 55.4, 55.5, 125.4, 125.5, 225.4, 225.5, 325.4],
+              [0, 50, 51, 100, 101, 150, 151, 200, 201, 300, 301, 500]),
+    "pm10": (24, [0, 54, 55, 154, 155, 254, 255, 354, 355, 424, 425, 604],
+             [0, 50, 51, 100, 101, 150, 151, 200, 201, 300, 301, 500]),
+    "ozone": (8, [0, 54, 55, 70, 71, 85, 86, 105, 106, 200],
+              [0, 50, 51, 100, 101, 150, 151, 200, 201, 300])
+}
+OZONE_UG_M3_PER_PPB = 1.963
+AQI_CATEGORIES = [(50, "Good"), (100, "Moderate"), (150, "Unhealthy for Sensitive Groups"),
+                  (200, "Unhealthy"), (300, "Very Unhealthy"), (float("inf"), "Hazardous")]
+# EPA guidance for each AQI_CATEGORIES band, so a category and its advice always agree
+AQI_HEALTH_RECOMMENDATIONS = {
+    "Good": "Air quality is good. Outdoor activities are safe.",
+    "Moderate": "Moderate air quality. Unusually sensitive individuals should limit prolonged outdoor exertion.",
+    "Unhealthy for Sensitive Groups": "Sensitive groups (children, older adults, people with heart or lung disease) "
+                                      "should limit prolonged outdoor exertion.",
+    "Unhealthy": "Everyone should limit prolonged outdoor exertion; sensitive groups should avoid it.",
+    "Very Unhealthy": "Everyone should avoid prolonged outdoor exertion; sensitive groups should stay indoors.",
+    "Hazardous": "Everyone should avoid all outdoor exertion."
+}
+# An hour is stagnant below this 10 m wind (m/s) with no rain and, where the boundary layer
+# height is known, a ventilation index (wind x mixing height, m2/s) below the poor threshold
+STAGNATION_WIND_MS = 3.2
+STAGNATION_MAX_PRECIPITATION_MM = 0.1
+VENTILATION_POOR = 2350
+VENTILATION_GOOD = 4700
+# NWS heat index at which "extreme caution" starts
+HEAT_STRESS_INDEX_C = 32.0
+
+# Governorate centres analyzed when no other location source is configured
+MAJOR_CITIES = {
+    "Damascus": {"lat": 33.51, "lon": 36.29, "population": 2103000},
+    "Aleppo": {"lat": 36.20, "lon": 37.16, "population": 4118000},
+    "Idlib": {"lat": 35.933, "lon": 36.633, "population": 1172000},
+    "Rif Dimashq": {"lat": 33.5, "lon": 37.3833, "population": 3372000},
+    "Homs": {"lat": 34.73, "lon": 36.72, "population": 1790000},
+    "Hama": {"lat": 35.13, "lon": 36.76, "population": 2147000},
+    "Daraa": {"lat": 32.6264, "lon": 36.1033, "population": 966000},
+    "Latakia": {"lat": 35.53, "lon": 35.79, "population": 1346000},
+    "Deir ez-Zor": {"lat": 35.34, "lon": 40.14, "population": 1267000},
+    "Quneitra": {"lat": 33.0776, "lon": 35.8934, "population": 124000},
+    "Raqqa": {"lat": 35.95, "lon": 39.01, "population": 940000},
+    "Al-Hasakah": {"lat": 36.5079, "lon": 40.7463, "population": 1865000},
+    "Tartus": {"lat": 34.89, "lon": 35.89, "population": 1172000},
+    "As-Suwayda": {"lat": 32.709, "lon": 36.5695, "population": 540000}
+}
+
+# Bounding box used for grid location sources (south, west, north, east)
+SYRIA_BBOX = (32.3, 35.6, 37.4, 42.4)
+
+# Interpolated surfaces: default metrics, grid cell size in degrees, inverse-distance
+# weighting neighbours and power, and cells per side of each surface tile
+SURFACE_METRICS = ["temperature_celsius", "annual_precipitation_mm", "estimated_aqi"]
+SURFACE_RESOLUTION = 0.02
+IDW_NEIGHBORS = 8
+IDW_POWER = 2.0
+SURFACE_TILE_SIZE = 64
+# Quantized surface code for cells without a value
+SURFACE_NODATA = 65535
+
+# Tile size in degrees for --shard-by region: nearby locations stay in one shard,
+# so grid-cell dedup and batched requests keep working within it
+SHARD_REGION_DEGREES = 1.0
+
+# Alternative spellings found in population.csv and the admin boundaries, keyed by normalized name
+GOVERNORATE_ALIASES = {
+    "hamah": "Hama", "lattakia": "Latakia", "dayr az zawr": "Deir ez-Zor", "deir ezzor": "Deir ez-Zor",
+    "dara": "Daraa", "ar raqqah": "Raqqa", "al hasakah": "Al-Hasakah", "al-hasakeh": "Al-Hasakah",
+    "as suwayda": "As-Suwayda", "tartous": "Tartus", "idleb": "Idlib", "rural damascus": "Rif Dimashq",
+    "al qunaytirah": "Quneitra", "sweida": "As-Suwayda"
+}
+
+# Days re-fetched before the last complete cached day, to pick up late upstream revisions
+CACHE_REFRESH_OVERLAP_DAYS = 3
+
+# Daemon mode refresh interval per source, in seconds: conditions and the hourly outlook
+# change hourly, the archive gains a day daily, NASA POWER lags by days, World Bank data almost never changes
+DEFAULT_REFRESH_INTERVALS = {
+    "current_weather": 3600,
+    "historical_weather": 24 * 3600,
+    "nasa_power": 24 * 3600,
+    "world_bank": 7 * 24 * 3600,
+    "hourly": 3600
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the sustained request rate to a host"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostThrottle:
+    """Per-host concurrency limit plus token-bucket rate limit"""
+
+    def __init__(self, host_limits: Optional[Dict[str, Dict[str, float]]] = None):
+        self.host_limits = dict(DEFAULT_HOST_LIMITS)
+        self.host_limits.update(host_limits or {})
+        self.semaphores = {}
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _limiters(self, host: str):
+        with self.lock:
+            if host not in self.semaphores:
+                limit = self.host_limits.get(host, FALLBACK_HOST_LIMIT)
+                self.semaphores[host] = threading.BoundedSemaphore(int(limit["concurrency"]))
+                self.buckets[host] = TokenBucket(limit["rate"], int(limit.get("burst", 1)))
+            return self.semaphores[host], self.buckets[host]
+
+    @contextmanager
+    def slot(self, url: str):
+        """Hold a request slot for the host of the given URL"""
+        semaphore, bucket = self._limiters(urlparse(url).netloc)
+        with semaphore:
+            bucket.acquire()
+            yield
+
+
+class RunMetrics:
+    """Thread-safe stage timers and per-endpoint request, byte and JSON decode counters for one run"""
+
     def __init__(self):
-        self.major_cities = {
-            "Damascus": {"lat": 33.51, "lon": 36.29, "population": 2103000},
-            "Aleppo": {"lat": 36.20, "lon": 37.16, "population": 4118000},
-            "Idlib": {"lat": 35.933, "lon": 36.633, "population": 1172000},
-            "Rif Dimashq": {"lat": 33.5, "lon": 37.3833, "population": 3372000},
-            "Homs": {"lat": 34.73, "lon": 36.72, "population": 1790000},
-            "Hama": {"lat": 35.13, "lon": 36.76, "population": 2147000},
-            "Daraa": {"lat": 32.6264, "lon": 36.1033, "population": 966000},
-            "Latakia": {"lat": 35.53, "lon": 35.79, "population": 1346000},
-            "Deir ez-Zor": {"lat": 35.34, "lon": 40.14, "population": 1267000},
-            "Quneitra": {"lat": 33.0776, "lon": 35.8934, "population": 124000},
-            "Raqqa": {"lat": 35.95, "lon": 39.01, "population": 940000},
-            "Al-Hasakah": {"lat": 36.5079, "lon": 40.7463, "population": 1865000},
-            "Tartus": {"lat": 34.89, "lon": 35.89, "population": 1172000},
-            "As-Suwayda": {"lat": 32.709, "lon": 36.5695, "population": 540000}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.stages = {}
+        self.stage_cpu = {}
+        self.endpoints = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started, cpu_started = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+            with self.lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+                self.stage_cpu[name] = self.stage_cpu.get(name, 0.0) + cpu
+
+    def endpoint(self, url: str) -> Dict[str, float]:
+        parsed = urlparse(url)
+        return self.endpoints.setdefault(parsed.netloc + parsed.path, {
+            "requests": 0, "request_seconds": 0.0, "bytes": 0, "decode_seconds": 0.0
+        })
+
+    def record_request(self, url: str, seconds: float, size: int):
+        with self.lock:
+            stats = self.endpoint(url)
+            stats["requests"] += 1
+            stats["request_seconds"] += seconds
+            stats["bytes"] += size
+
+    def record_decode(self, url: str, seconds: float):
+        with self.lock:
+            self.endpoint(url)["decode_seconds"] += seconds
+
+    def snapshot(self, **extra: Any) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "started_at": datetime.fromtimestamp(self.started).isoformat(),
+                "duration_seconds": round(time.time() - self.started, 3),
+                "stages_seconds": {name: round(seconds, 3) for name, seconds in self.stages.items()},
+                "stages_cpu_seconds": {name: round(seconds, 3) for name, seconds in self.stage_cpu.items()},
+                "endpoints": {
+                    name: {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
+                    for name, stats in self.endpoints.items()
+                },
+                **extra
+            }
+
+    def write_json(self, path: str, **extra: Any):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(**extra), f, indent=2)
+
+    def write_prometheus(self, path: str, **extra: Any):
+        """Write a node-exporter textfile, atomically so the collector never reads a partial file"""
+        snapshot = self.snapshot(**extra)
+        lines = [
+            "# TYPE syria_env_run_duration_seconds gauge",
+            f"syria_env_run_duration_seconds {snapshot['duration_seconds']}",
+            "# TYPE syria_env_last_run_timestamp_seconds gauge",
+            f"syria_env_last_run_timestamp_seconds {time.time():.0f}",
+            "# TYPE syria_env_stage_seconds gauge"
+        ]
+        lines += [f'syria_env_stage_seconds{{stage="{name}"}} {seconds}' for name, seconds in snapshot["stages_seconds"].items()]
+        lines.append("# TYPE syria_env_stage_cpu_seconds gauge")
+        lines += [f'syria_env_stage_cpu_seconds{{stage="{name}"}} {seconds}' for name, seconds in snapshot["stages_cpu_seconds"].items()]
+        for metric, key in (("requests_total", "requests"), ("request_seconds_total", "request_seconds"),
+                            ("bytes_total", "bytes"), ("decode_seconds_total", "decode_seconds")):
+            lines.append(f"# TYPE syria_env_endpoint_{metric} counter")
+            lines += [f'syria_env_endpoint_{metric}{{endpoint="{name}"}} {stats[key]}'
+                      for name, stats in snapshot["endpoints"].items()]
+        for name, value in extra.items():
+            if isinstance(value, (int, float)):
+                lines += [f"# TYPE syria_env_{name} gauge", f"syria_env_{name} {value}"]
+        
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_path, path)
+
+
+def run_with_profile(aggregator: "SyriaEnvironmentalDataAggregator", report_path: str) -> Dict[str, Any]:
+    """Run the aggregator under cProfile and tracemalloc and write a text report of both.
+
+    Before Python 3.12 cProfile only sees the thread that enables it, so every
+    thread started during the run (the fetch workers) gets its own profiler,
+    merged into the report. From 3.12 cProfile runs on sys.monitoring, which
+    covers every thread and refuses a second active profiler, so the main one
+    is used alone.
+    """
+    profiler = cProfile.Profile()
+    thread_profilers = []
+    lock = threading.Lock()
+    
+    def profile_thread(frame, event, arg):
+        # Runs once per new thread: hand the thread over to a profiler of its own
+        thread_profiler = cProfile.Profile()
+        with lock:
+            thread_profilers.append(thread_profiler)
+        thread_profiler.enable()
+    
+    per_thread = sys.version_info < (3, 12)
+    tracemalloc.start()
+    if per_thread:
+        threading.setprofile(profile_thread)
+    profiler.enable()
+    try:
+        return aggregator.run()
+    finally:
+        profiler.disable()
+        if per_thread:
+            threading.setprofile(None)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        with lock:
+            for thread_profiler in thread_profilers:
+                stats.add(thread_profiler)
+        stats.sort_stats("cumulative").print_stats(40)
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(f"Traced memory: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n\n")
+            f.write("Top allocations by line:\n")
+            for stat in snapshot.statistics("lineno")[:20]:
+                f.write(f"  {stat}\n")
+            threads = f"main thread and {len(thread_profilers)} worker threads" if per_thread else "all threads"
+            f.write(f"\nCPU profile (cumulative, {threads}):\n")
+            f.write(stream.getvalue())
+        print(f"Profile report: {report_path}")
+
+
+class HttpTransport:
+    """Pooled keep-alive HTTP session with per-host throttling, retries and latency counters.
+
+    429 and 5xx responses and connection errors are retried with exponential
+    backoff and full jitter (or the server's Retry-After); the host slot is
+    released while backing off so other requests can proceed. base_urls maps a
+    host to a replacement base URL (e.g. a local mock server); throttling and
+    counters still use the original host.
+    """
+
+    def __init__(self, throttle: HostThrottle, pool_size: int = 8, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_cap: float = 30.0, metrics: Optional[RunMetrics] = None,
+                 base_urls: Optional[Dict[str, str]] = None):
+        self.throttle = throttle
+        self.metrics = metrics
+        self.base_urls = base_urls or {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(throttle.host_limits) + 1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.lock = threading.Lock()
+        self.host_stats = {}
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: int = 30,
+            headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        host = urlparse(url).netloc
+        target = self.resolve(url)
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            try:
+                with self.throttle.slot(url):
+                    started = time.monotonic()
+                    response = self.session.get(target, params=params, timeout=timeout, headers=headers)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.record(host, time.monotonic() - started, retried=attempt < self.max_retries)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.backoff_delay(attempt))
+                continue
+            
+            retry = response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries
+            self.record(host, time.monotonic() - started, retried=retry)
+            if self.metrics:
+                self.metrics.record_request(url, time.monotonic() - started, len(response.content))
+            if not retry:
+                return response
+            time.sleep(self.backoff_delay(attempt, response.headers.get("Retry-After")))
+        
+        return response
+
+    def resolve(self, url: str) -> str:
+        parsed = urlparse(url)
+        base_url = self.base_urls.get(parsed.netloc)
+        if base_url is None:
+            return url
+        return base_url.rstrip("/") + url[len(f"{parsed.scheme}://{parsed.netloc}"):]
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(self.backoff_cap, float(retry_after))
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def record(self, host: str, latency: float, retried: bool):
+        with self.lock:
+            stats = self.host_stats.setdefault(
+                host, {"requests": 0, "retries": 0, "total_latency_s": 0.0, "max_latency_s": 0.0}
+            )
+            stats["requests"] += 1
+            stats["retries"] += int(retried)
+            stats["total_latency_s"] += latency
+            stats["max_latency_s"] = max(stats["max_latency_s"], latency)
+
+    def print_report(self):
+        for host, stats in sorted(self.host_stats.items()):
+            avg_ms = stats["total_latency_s"] / stats["requests"] * 1000
+            print(f"{host}: {stats['requests']} requests, {stats['retries']} retries, "
+                  f"avg {avg_ms:.0f} ms, max {stats['max_latency_s'] * 1000:.0f} ms")
+
+
+def open_sqlite(path: str) -> sqlite3.Connection:
+    """Connection shared across worker threads; WAL with synchronous=NORMAL makes a commit a log append, not an fsync"""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ResponseCache:
+    """SQLite-backed cache of historical API payloads with TTL and LRU eviction.
+
+    Entries older than the TTL are dropped so the full history is periodically
+    re-downloaded (upstream reanalysis data gets revised); between those refreshes
+    only the missing tail of the date range is fetched and merged in.
+
+    Reads only note the access time in memory; evict() writes those back in one
+    transaction, so a warm run does not pay a commit per hit.
+    """
+
+    def __init__(self, path: str, ttl_days: float = 30, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = open_sqlite(path)
+        self.accessed = {}
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, payload TEXT NOT NULL, "
+            "size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self.stats = {"hits": 0, "partial_hits": 0, "misses": 0, "bytes_downloaded": 0, "bytes_saved": 0}
+
+    @staticmethod
+    def make_key(endpoint: str, lat: float, lon: float, variables: str) -> str:
+        return f"{endpoint}|{lat:.4f}|{lon:.4f}|{variables}"
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (payload, created_at) for a live entry, or None"""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                # Replaced by the refetch's put(), or dropped by evict()
+                return None
+            self.accessed[key] = now
+        return json.loads(row[0]), row[1]
+
+    def put(self, key: str, endpoint: str, payload: Dict[str, Any], created_at: Optional[float] = None):
+        now = time.time()
+        text = json.dumps(payload, separators=(",", ":"))
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, payload, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, text, len(text), created_at or now, now)
+            )
+            self.conn.commit()
+            self.accessed.pop(key, None)
+
+    def record(self, outcome: str, bytes_downloaded: int = 0, bytes_saved: int = 0):
+        """Count a hit / partial_hit / miss and the bytes it moved or avoided"""
+        with self.lock:
+            self.stats[outcome] += 1
+            self.stats["bytes_downloaded"] += bytes_downloaded
+            self.stats["bytes_saved"] += max(0, bytes_saved)
+
+    def evict(self):
+        """Write back buffered access times, drop expired entries, then least recently used ones until under max_bytes"""
+        with self.lock:
+            self.conn.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                  [(accessed_at, key) for key, accessed_at in self.accessed.items()])
+            self.accessed.clear()
+            self.conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for key, size in self.conn.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed_at"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    total -= size
+            self.conn.commit()
+
+    def print_report(self):
+        stats = self.stats
+        print(f"Cache: {stats['hits']} hits, {stats['partial_hits']} incremental, {stats['misses']} misses")
+        print(f"Cache: {stats['bytes_downloaded']} bytes downloaded, ~{stats['bytes_saved']} bytes saved")
+
+
+class RunJournal:
+    """SQLite journal of each city's finished result and fetch timestamps, written as the run goes.
+
+    A later run with resume enabled reuses results completed within the freshness
+    window (for the same coordinates and run configuration, see config) and only
+    redoes failed, stale or missing cities. Records are committed by flush(), once
+    per city serially and once per chunk when fetching concurrently.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = open_sqlite(path)
+        # Fingerprint of the settings that shape a result; set by the aggregator
+        self.config = ""
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS city_results ("
+            "city TEXT PRIMARY KEY, lat REAL NOT NULL, lon REAL NOT NULL, status TEXT NOT NULL, "
+            "completed_at REAL NOT NULL, fetched_at TEXT, result TEXT, config TEXT)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(city_results)")}
+        if "config" not in columns:
+            # Journals from before the fingerprint; their rows never match and are redone
+            self.conn.execute("ALTER TABLE city_results ADD COLUMN config TEXT")
+        self.conn.commit()
+
+    def record(self, city_name: str, city_info: Dict, status: str, result: Optional[Dict[str, Any]] = None,
+               fetched_at: Optional[Dict[str, str]] = None):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO city_results (city, lat, lon, status, completed_at, fetched_at, result, config) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (city_name, city_info["lat"], city_info["lon"], status, time.time(),
+                 json.dumps(fetched_at or {}), json.dumps(result) if result is not None else None, self.config)
+            )
+
+    def flush(self):
+        with self.lock:
+            self.conn.commit()
+
+    def completed(self, cities: Dict[str, Dict], max_age_seconds: float) -> Dict[str, Dict[str, Any]]:
+        """Journaled results for the given cities that succeeded recently at the same coordinates and config"""
+        cutoff = time.time() - max_age_seconds
+        fresh = {}
+        with self.lock:
+            for city_name, city_info in cities.items():
+                row = self.conn.execute(
+                    "SELECT lat, lon, result FROM city_results "
+                    "WHERE city = ? AND status = 'ok' AND completed_at >= ? AND config = ?",
+                    (city_name, cutoff, self.config)
+                ).fetchone()
+                if row and row[0] == city_info["lat"] and row[1] == city_info["lon"]:
+                    fresh[city_name] = json.loads(row[2])
+        return fresh
+
+
+class ClimatologyAccumulator:
+    """Running per-year and per-month aggregates of one location's daily archive history.
+
+    Chunks of days can be added in any order; only a handful of small float64
+    arrays is kept, so multi-decade histories never have to be held in memory.
+    """
+
+    def __init__(self, first_year: int, last_year: int):
+        self.first_year = first_year
+        self.years = last_year - first_year + 1
+        self.yearly = {key: np.zeros(self.years) for key in ("temp_sum", "temp_count", "rain_sum", "rain_count")}
+        self.monthly_rain_sum = np.zeros(12)
+        self.monthly_rain_count = np.zeros(12)
+        self.totals = {key: 0.0 for key in ("tmax_sum", "tmax_count", "tmin_sum", "tmin_count",
+                                            "pressure_sum", "pressure_count", "rain_total")}
+        self.max_wind = np.nan
+        self.chunks = 0
+
+    def add(self, days: np.ndarray, columns: Dict[str, np.ndarray]):
+        """Fold a chunk of days (datetime64[D]) and their float32 variable columns into the aggregates"""
+        year_index = days.astype("datetime64[Y]").astype(int) + 1970 - self.first_year
+        month_index = days.astype("datetime64[M]").astype(int) % 12
+        inside = (year_index >= 0) & (year_index < self.years)
+        
+        def masked(key: str) -> Tuple[np.ndarray, np.ndarray]:
+            values = columns[key].astype(np.float64)
+            valid = inside & ~np.isnan(values)
+            return np.where(valid, values, 0.0), valid
+        
+        if "temperature_2m_mean" in columns:
+            values, valid = masked("temperature_2m_mean")
+            self.yearly["temp_sum"] += np.bincount(year_index[inside], values[inside], self.years)
+            self.yearly["temp_count"] += np.bincount(year_index[inside], valid[inside], self.years)
+        if "precipitation_sum" in columns:
+            values, valid = masked("precipitation_sum")
+            self.yearly["rain_sum"] += np.bincount(year_index[inside], values[inside], self.years)
+            self.yearly["rain_count"] += np.bincount(year_index[inside], valid[inside], self.years)
+            self.monthly_rain_sum += np.bincount(month_index[inside], values[inside], 12)
+            self.monthly_rain_count += np.bincount(month_index[inside], valid[inside], 12)
+            self.totals["rain_total"] += values.sum()
+        for key, prefix in (("temperature_2m_max", "tmax"), ("temperature_2m_min", "tmin"),
+                            ("surface_pressure_mean", "pressure")):
+            if key in columns:
+                values, valid = masked(key)
+                self.totals[f"{prefix}_sum"] += values.sum()
+                self.totals[f"{prefix}_count"] += valid.sum()
+        if "wind_speed_10m_max" in columns and inside.any():
+            self.max_wind = np.fmax(self.max_wind, np.nanmax(np.where(inside, columns["wind_speed_10m_max"], np.nan)))
+        self.chunks += 1
+
+    def annual_series(self, key: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(years, values) for years that had any data: mean temperature or total rainfall"""
+        counts = self.yearly[f"{key}_count"]
+        years = np.flatnonzero(counts > 0)
+        sums = self.yearly[f"{key}_sum"][years]
+        return years + self.first_year, sums / counts[years] if key == "temp" else sums
+
+
+def shift_date(value: str, days: int, fmt: str) -> str:
+    return (datetime.strptime(value, fmt) + timedelta(days=days)).strftime(fmt)
+
+
+def least_squares_slopes(x: np.ndarray, y: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Ordinary least-squares slope of y on x within each contiguous segment, skipping NaNs"""
+    lengths = np.diff(np.r_[starts, len(x)])
+    valid = ~np.isnan(y)
+    # Centre x on each segment's first value to keep the normal equations well conditioned
+    x = np.where(valid, x - np.repeat(x[starts], lengths), 0.0)
+    y = np.where(valid, y, 0.0)
+    n = np.add.reduceat(valid.astype(np.float64), starts)
+    sx, sy = np.add.reduceat(x, starts), np.add.reduceat(y, starts)
+    sxx, sxy = np.add.reduceat(x * x, starts), np.add.reduceat(x * y, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (n * sxy - sx * sy) / (n * sxx - sx * sx)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing NaN-skipping mean over the last window columns of every row at once, from cumulative sums"""
+    present = ~np.isnan(values)
+    sums = np.zeros((values.shape[0], values.shape[1] + 1))
+    counts = np.zeros(sums.shape, dtype=np.int64)
+    np.cumsum(np.where(present, values, 0.0), axis=1, out=sums[:, 1:])
+    np.cumsum(present, axis=1, out=counts[:, 1:])
+    lag = np.maximum(np.arange(1, values.shape[1] + 1) - window, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums[:, 1:] - sums[:, lag]) / (counts[:, 1:] - counts[:, lag])
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing NaN-skipping maximum over the last window columns of every row, as a strided view"""
+    padded = np.pad(values, ((0, 0), (window - 1, 0)), constant_values=np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmax(np.lib.stride_tricks.sliding_window_view(padded, window, axis=1), axis=2)
+
+
+def heat_index_celsius(temperature_c: np.ndarray, humidity_percent: np.ndarray) -> np.ndarray:
+    """NWS heat index (Rothfusz regression with its low-humidity and humid adjustments), elementwise"""
+    t = temperature_c * 9 / 5 + 32
+    rh = humidity_percent
+    simple = 0.5 * (t + 61.0 + (t - 68.0) * 1.2 + rh * 0.094)
+    full = (-42.379 + 2.04901523 * t + 10.14333127 * rh - 0.22475541 * t * rh - 6.83783e-3 * t * t
+            - 5.481717e-2 * rh * rh + 1.22874e-3 * t * t * rh + 8.5282e-4 * t * rh * rh - 1.99e-6 * t * t * rh * rh)
+    with np.errstate(invalid="ignore"):
+        full -= np.where((rh < 13) & (t >= 80) & (t <= 112), (13 - rh) / 4 * np.sqrt(np.clip(17 - np.abs(t - 95), 0, None) / 17), 0)
+        full += np.where((rh > 85) & (t >= 80) & (t <= 87), (rh - 85) / 10 * (87 - t) / 5, 0)
+    index = np.where((simple + t) / 2 < 80, simple, full)
+    return (index - 32) * 5 / 9
+
+
+def parse_daily_columns(daily: Dict[str, List], variables: List[str]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Convert an Open-Meteo daily block into datetime64[D] days and float32 columns (missing values as NaN)"""
+    days = np.array(daily.get("time", []), dtype="datetime64[D]")
+    columns = {key: np.array(daily[key], dtype=np.float32) for key in variables if key in daily}
+    return days, columns
+
+
+def normalize_location_name(name: str) -> str:
+    """Lower-case a place name and strip diacritics and apostrophes, like the frontend's normalizeCityName"""
+    decomposed = unicodedata.normalize("NFKD", name.strip())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.replace("'", "").replace("`", "").lower()
+
+
+def csv_locations(path: str, known_locations: Dict[str, Dict], data_type: str = "population") -> Iterator[Tuple[str, Dict]]:
+    """Yield locations from a CSV with name and either lat/lon or a known governorate name.
+
+    Rows are read lazily. population.csv style files (several rows per place with
+    a data_type and date) keep the most recent population row per place; names
+    without coordinates are resolved against known_locations.
+    """
+    known = {normalize_location_name(name): name for name in known_locations}
+    known.update({alias: name for alias, name in GOVERNORATE_ALIASES.items()})
+    latest = {}
+    
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if "data_type" in row and row["data_type"] != data_type:
+                continue
+            
+            name = row.get("name") or row.get("city_name")
+            lat = row.get("lat") or row.get("latitude")
+            lon = row.get("lon") or row.get("longitude")
+            population = int(float(row["population"])) if row.get("population") else None
+            
+            if lat and lon:
+                yield name, {"lat": float(lat), "lon": float(lon), "population": population}
+                continue
+            
+            canonical = known.get(normalize_location_name(name or ""))
+            if canonical is None:
+                print(f"Skipping location without coordinates: {name}")
+                continue
+            date = row.get("date", "")
+            date = date if date[:1].isdigit() else ""
+            if canonical not in latest or date >= latest[canonical][0]:
+                latest[canonical] = (date, population)
+    
+    for name, (_, population) in latest.items():
+        info = known_locations[name]
+        yield name, {"lat": info["lat"], "lon": info["lon"], "population": population}
+
+
+def polygon_rings(geometry: Dict[str, Any], max_vertices: int = 2000) -> List[np.ndarray]:
+    """Exterior rings of a (Multi)Polygon as arrays of (lon, lat), decimated to at most max_vertices"""
+    polygons = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+    rings = []
+    for polygon in polygons:
+        ring = np.asarray(polygon[0], dtype=float)[:, :2]
+        step = max(1, len(ring) // max_vertices)
+        rings.append(ring[::step])
+    return rings
+
+
+def points_in_rings(lats: np.ndarray, lons: np.ndarray, rings: List[np.ndarray]) -> np.ndarray:
+    """Vectorized even-odd ray casting: which points fall inside any of the rings"""
+    inside = np.zeros(len(lats), dtype=bool)
+    for ring in rings:
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        candidates = np.flatnonzero(
+            (lons >= x1.min()) & (lons <= x1.max()) & (lats >= y1.min()) & (lats <= y1.max())
+        )
+        crossings = np.zeros(len(candidates), dtype=bool)
+        for start in range(0, len(candidates), 256):
+            index = candidates[start:start + 256]
+            py, px = lats[index, None], lons[index, None]
+            straddles = (y1 > py) != (y2 > py)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x_cross = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+            crossings[start:start + 256] = np.logical_xor.reduce(straddles & (px < x_cross), axis=1)
+        inside[candidates] |= crossings
+    return inside
+
+
+def geojson_locations(path: str, name_property: str = "ADM1_EN") -> Iterator[Tuple[str, Dict]]:
+    """Yield one location per GeoJSON feature, at its center_lat/center_lon or polygon centroid"""
+    with open(path, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    
+    for feature in features:
+        properties = feature.get("properties") or {}
+        name = properties.get(name_property) or properties.get("name") or properties.get("Name")
+        if properties.get("center_lat") is not None and properties.get("center_lon") is not None:
+            lat, lon = properties["center_lat"], properties["center_lon"]
+        else:
+            ring = max(polygon_rings(feature["geometry"]), key=len)
+            x, y = ring[:, 0], ring[:, 1]
+            cross = x * np.roll(y, -1) - np.roll(x, -1) * y
+            area = cross.sum() / 2
+            lon = float(((x + np.roll(x, -1)) * cross).sum() / (6 * area))
+            lat = float(((y + np.roll(y, -1)) * cross).sum() / (6 * area))
+        yield name, {"lat": round(lat, 4), "lon": round(lon, 4), "population": properties.get("population")}
+
+
+def grid_locations(resolution: float, boundary_path: Optional[str] = None,
+                   bbox: Tuple[float, float, float, float] = SYRIA_BBOX) -> Iterator[Tuple[str, Dict]]:
+    """Yield a regular lat/lon grid over Syria, optionally clipped to (and named by) boundary polygons"""
+    south, west, north, east = bbox
+    lats = np.round(np.arange(south, north + resolution / 2, resolution), 4)
+    lons = np.round(np.arange(west, east + resolution / 2, resolution), 4)
+    grid_lats, grid_lons = (axis.ravel() for axis in np.meshgrid(lats, lons, indexing="ij"))
+    
+    if not boundary_path:
+        for lat, lon in zip(grid_lats.tolist(), grid_lons.tolist()):
+            yield f"{lat:.4f},{lon:.4f}", {"lat": lat, "lon": lon, "population": None}
+        return
+    
+    with open(boundary_path, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    assigned = np.zeros(len(grid_lats), dtype=bool)
+    for feature in features:
+        region = (feature.get("properties") or {}).get("ADM1_EN", "")
+        inside = points_in_rings(grid_lats, grid_lons, polygon_rings(feature["geometry"])) & ~assigned
+        assigned |= inside
+        for lat, lon in zip(grid_lats[inside].tolist(), grid_lons[inside].tolist()):
+            yield f"{region} {lat:.4f},{lon:.4f}", {"lat": lat, "lon": lon, "population": None}
+
+
+def rings_mask(lats: np.ndarray, lons: np.ndarray, rings: List[np.ndarray]) -> np.ndarray:
+    """Scanline fill of a regular grid: which (lat row, lon column) cells fall inside any of the rings"""
+    mask = np.zeros((len(lats), len(lons)), dtype=bool)
+    for ring in rings:
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        straddles = (y1 > lats[:, None]) != (y2 > lats[:, None])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = x1 + (lats[:, None] - y1) * (x2 - x1) / (y2 - y1)
+        for row in np.flatnonzero(straddles.any(axis=1)):
+            crossings = np.sort(x_cross[row, straddles[row]])
+            mask[row] |= np.searchsorted(crossings, lons) % 2 == 1
+    return mask
+
+
+def nearest_neighbors(points: np.ndarray, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Distances and indices of the k nearest points to each query, both given as (n, 2) planar coordinates"""
+    k = min(k, len(points))
+    if cKDTree is not None:
+        distances, indices = cKDTree(points).query(queries, k=k)
+        return distances.reshape(len(queries), k), indices.reshape(len(queries), k)
+    
+    # Without scipy: bucket everything into square cells holding about k points each and
+    # search outward ring by ring. Points outside ring r of a query's cell are at least
+    # r cells away, so a query is final once its k-th distance is within that radius.
+    low = np.minimum(points.min(axis=0), queries.min(axis=0))
+    extent = np.maximum(points.max(axis=0), queries.max(axis=0)) - low
+    size = float(np.clip(np.sqrt(extent[0] * extent[1] * k / len(points)), extent.max() / 256, extent.max() / 8)) or 1.0
+    point_cells = np.floor((points - low) / size).astype(np.int64)
+    query_cells = np.floor((queries - low) / size).astype(np.int64)
+    span = int(max(point_cells.max(), query_cells.max())) + 1
+    
+    distances = np.empty((len(queries), k))
+    indices = np.empty((len(queries), k), dtype=np.int64)
+    keys = query_cells[:, 0] * span + query_cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    for pending in np.split(order, np.flatnonzero(np.diff(keys[order])) + 1):
+        cell = query_cells[pending[0]]
+        ring = 1
+        while len(pending):
+            near = np.flatnonzero(np.abs(point_cells - cell).max(axis=1) <= ring)
+            if len(near) >= k:
+                # Squared distances are enough to rank candidates; only the k kept get a square root
+                candidate = ((queries[pending, 0, None] - points[near, 0]) ** 2
+                             + (queries[pending, 1, None] - points[near, 1]) ** 2)
+                nearest = np.argpartition(candidate, k - 1, axis=1)[:, :k]
+                found = np.take_along_axis(candidate, nearest, axis=1)
+                final = (found.max(axis=1) <= (ring * size) ** 2) | (ring >= span)
+                distances[pending[final]] = np.sqrt(found[final])
+                indices[pending[final]] = near[nearest[final]]
+                pending = pending[~final]
+            ring += 1
+    return distances, indices
+
+
+def idw_weights(distances: np.ndarray, power: float = IDW_POWER) -> np.ndarray:
+    """Normalized inverse-distance weights per row; a query on top of a point takes that point's value"""
+    with np.errstate(divide="ignore"):
+        weights = distances ** -power
+    exact = np.isinf(weights)
+    on_point = exact.any(axis=1)
+    weights[on_point] = exact[on_point]
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def surface_grid(resolution: float, bbox: Tuple[float, float, float, float] = SYRIA_BBOX) -> Tuple[np.ndarray, np.ndarray]:
+    """Cell-centre latitudes (north to south, image row order) and longitudes of a regular grid over bbox"""
+    south, west, north, east = bbox
+    lats = north - (np.arange(math.ceil(round((north - south) / resolution, 9))) + 0.5) * resolution
+    lons = west + (np.arange(math.ceil(round((east - west) / resolution, 9))) + 0.5) * resolution
+    return lats, lons
+
+
+def interpolate_surfaces(lats: np.ndarray, lons: np.ndarray, values: Dict[str, np.ndarray],
+                         grid_lats: np.ndarray, grid_lons: np.ndarray, mask: Optional[np.ndarray] = None,
+                         neighbors: int = IDW_NEIGHBORS, power: float = IDW_POWER) -> Dict[str, np.ndarray]:
+    """Inverse-distance weighted surfaces of each metric on a (grid_lats x grid_lons) raster.
+
+    Distances are planar on an equirectangular projection around the grid's
+    mean latitude, close enough at Syria's scale. Each metric uses only the
+    locations where it is present; metrics present at the same locations share
+    one neighbour search. Cells outside mask, or with no data at all, are NaN.
+    """
+    scale = np.array([111.32 * math.cos(math.radians(float(grid_lats.mean()))), 110.57])
+    cells = np.ones((len(grid_lats), len(grid_lons)), dtype=bool) if mask is None else mask
+    rows, columns = np.nonzero(cells)
+    queries = np.column_stack([grid_lons[columns], grid_lats[rows]]) * scale
+    points = np.column_stack([lons, lats]) * scale
+    
+    groups = {}
+    for metric, column in values.items():
+        present = ~np.isnan(column)
+        groups.setdefault(present.tobytes(), (present, []))[1].append(metric)
+    
+    surfaces = {}
+    for present, metrics in groups.values():
+        weights = indices = None
+        if present.any() and len(queries):
+            distances, indices = nearest_neighbors(points[present], queries, neighbors)
+            weights = idw_weights(distances, power)
+        for metric in metrics:
+            surface = np.full(cells.shape, np.nan, dtype=np.float32)
+            if weights is not None:
+                surface[rows, columns] = (weights * values[metric][present][indices]).sum(axis=1)
+            surfaces[metric] = surface
+    return surfaces
+
+
+def shard_of(city_name: str, city_info: Dict, count: int, by: str = "hash") -> int:
+    """Shard (0..count-1) a location belongs to, stable across processes and hosts"""
+    if by == "region":
+        key = f"{math.floor(city_info['lat'] / SHARD_REGION_DEGREES)},{math.floor(city_info['lon'] / SHARD_REGION_DEGREES)}"
+    else:
+        key = city_name
+    return zlib.crc32(key.encode("utf-8")) % count
+
+
+def shard_path(path: str, index: int) -> str:
+    """path with a .shardNNN marker before its extension"""
+    root, extension = os.path.splitext(path)
+    return f"{root}.shard{index:03d}{extension}"
+
+
+def iter_report_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a report written as JSON lines, or of a JSON report converted to the same record shape"""
+    with open(path, encoding="utf-8") as f:
+        if f.read(8).startswith('{"type"'):
+            f.seek(0)
+            for line in f:
+                yield json.loads(line)
+            return
+        f.seek(0)
+        report = json.load(f)
+    for key, value in report.items():
+        if key == "cities":
+            for city_name, city_data in value.items():
+                yield {"type": "city", "name": city_name, "data": city_data}
+        else:
+            yield {"type": key, "data": value}
+
+
+def indent_json(value: Any, level: int) -> str:
+    """json.dumps(indent=2) output re-indented to sit at the given depth of an enclosing document"""
+    return json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n" + " " * level)
+
+
+class ReportWriter:
+    """Writes the whole report with one json.dump once the run finishes.
+
+    An atomic writer writes to a .tmp sibling and publish() renames it into
+    place, so readers never see a half-written report.
+    """
+
+    streaming = False
+    label = "Output file"
+
+    def __init__(self, path: str, atomic: bool = False):
+        self.target = path
+        self.path = path + ".tmp" if atomic else path
+        self.size = 0
+        self.file = None
+
+    def open(self, report_data: Dict[str, Any]):
+        pass
+
+    def write_city(self, city_name: str, city_data: Dict[str, Any]):
+        pass
+
+    def close(self, report_data: Dict[str, Any]):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(report_data, f, indent=2, ensure_ascii=False)
+            self.size = f.tell()
+
+    def abort(self):
+        if self.file:
+            self.file.close()
+        if self.path != self.target:
+            for suffix in self.suffixes():
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+    def suffixes(self) -> List[str]:
+        """Suffixes (appended to path) of every file this writer produces"""
+        return [""]
+
+    def publish(self):
+        if self.path != self.target:
+            for suffix in self.suffixes():
+                os.replace(self.path + suffix, self.target + suffix)
+
+
+class StreamingJsonReportWriter(ReportWriter):
+    """Writes the same JSON document incrementally, one city at a time as each completes.
+
+    The bytes match ReportWriter's json.dump output. A crashed run leaves the
+    cities written so far, minus the closing brackets.
+    """
+
+    streaming = True
+
+    def open(self, report_data: Dict[str, Any]):
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.file.write('{\n  "metadata": ' + indent_json(report_data["metadata"], 2) + ',\n  "cities": {')
+        self.cities_written = 0
+
+    def write_city(self, city_name: str, city_data: Dict[str, Any]):
+        separator = ",\n    " if self.cities_written else "\n    "
+        self.file.write(separator + json.dumps(city_name, ensure_ascii=False) + ": " + indent_json(city_data, 4))
+        self.file.flush()
+        self.cities_written += 1
+
+    def close(self, report_data: Dict[str, Any]):
+        self.file.write("\n  }" if self.cities_written else "}")
+        for key, value in report_data.items():
+            if key not in ("metadata", "cities"):
+                self.file.write(",\n  " + json.dumps(key) + ": " + indent_json(value, 2))
+        self.file.write("\n}")
+        self.size = self.file.tell()
+        self.file.close()
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """Writes one JSON record per line: metadata, country_level, each city, then the summary.
+
+    Every line is flushed as it is written, so a crashed run leaves a valid file.
+    """
+
+    streaming = True
+
+    def open(self, report_data: Dict[str, Any]):
+        self.file = open(self.path, 'w', encoding='utf-8')
+        for key, value in report_data.items():
+            if key != "cities":
+                self.write_record({"type": key, "data": value})
+
+    def write_city(self, city_name: str, city_data: Dict[str, Any]):
+        self.write_record({"type": "city", "name": city_name, "data": city_data})
+
+    def write_record(self, record: Dict[str, Any]):
+        self.file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def close(self, report_data: Dict[str, Any]):
+        self.write_record({"type": "summary", "data": report_data.get("summary", {})})
+        self.size = self.file.tell()
+        self.file.close()
+
+
+# (column, report section, key) for the compact columnar artifact; strings are dictionary-encoded
+COMPACT_REPORT_COLUMNS = [
+    ("lat", "coordinates", "latitude"),
+    ("lon", "coordinates", "longitude"),
+    ("population", None, "population"),
+    ("temperature_celsius", "current_conditions", "temperature_celsius"),
+    ("feels_like_celsius", "current_conditions", "feels_like_celsius"),
+    ("humidity_percent", "current_conditions", "humidity_percent"),
+    ("precipitation_mm", "current_conditions", "precipitation_mm"),
+    ("wind_speed_kmh", "current_conditions", "wind_speed_kmh"),
+    ("pressure_msl_hpa", "current_conditions", "pressure_msl_hpa"),
+    ("cloud_cover_percent", "current_conditions", "cloud_cover_percent"),
+    ("weather_description", "current_conditions", "weather_description"),
+    ("tomorrow_max_temp_c", "daily_forecast_summary", "tomorrow_max_temp_c"),
+    ("tomorrow_min_temp_c", "daily_forecast_summary", "tomorrow_min_temp_c"),
+    ("tomorrow_precipitation_mm", "daily_forecast_summary", "tomorrow_precipitation_mm"),
+    ("temperature_trend_celsius", "climate_trends", "temperature_trend_celsius"),
+    ("rainfall_trend_mm", "climate_trends", "rainfall_trend_mm"),
+    ("average_annual_rainfall_mm", "climate_trends", "average_annual_rainfall_mm"),
+    ("estimated_aqi", "air_quality", "estimated_aqi"),
+    ("aqi_category", "air_quality", "category"),
+    ("annual_precipitation_mm", "drought_risk", "annual_precipitation_mm"),
+    ("drought_risk", "drought_risk", "drought_risk"),
+    ("climate_classification", "drought_risk", "classification"),
+    ("avg_max_temp_c", "historical_summary", "avg_max_temp_c"),
+    ("avg_min_temp_c", "historical_summary", "avg_min_temp_c"),
+    ("total_precipitation_mm", "historical_summary", "total_precipitation_mm"),
+    ("peak_aqi", "hourly_outlook", "peak_aqi"),
+    ("peak_heat_index_c", "hourly_outlook", "peak_heat_index_c"),
+    ("heat_stress_hours", "hourly_outlook", "heat_stress_hours"),
+    ("stagnant_hours", "hourly_outlook", "stagnant_hours"),
+]
+
+# Compact columns that are numeric measurements, and so can be interpolated into surfaces
+SURFACE_METRIC_CHOICES = [
+    column for column, _, _ in COMPACT_REPORT_COLUMNS
+    if column not in ("lat", "lon", "population", "weather_description", "aqi_category", "drought_risk", "climate_classification")
+]
+
+
+class CompactReportWriter(ReportWriter):
+    """Writes a packed columnar JSON for the map: one array per metric plus a name -> row index.
+
+    Only the flat metric values are kept per location, so it can run alongside a
+    streaming writer. String metrics are stored as integer codes into
+    "categories"; "stats" holds each numeric column's [min, max] for colour
+    scales. Optional .gz / .br siblings are written pre-compressed.
+    """
+
+    streaming = True
+    label = "Compact output"
+
+    def __init__(self, path: str, compression: Optional[List[str]] = None, atomic: bool = False):
+        super().__init__(path, atomic)
+        self.compression = compression or []
+        self.names = []
+        self.columns = {column: [] for column, _, _ in COMPACT_REPORT_COLUMNS}
+        self.categories = {}
+
+    def open(self, report_data: Dict[str, Any]):
+        self.report_date = report_data["metadata"]["report_date"]
+
+    def write_city(self, city_name: str, city_data: Dict[str, Any]):
+        self.names.append(city_name)
+        for column, section, key in COMPACT_REPORT_COLUMNS:
+            value = (city_data.get(section) or {}).get(key) if section else city_data.get(key)
+            if isinstance(value, str):
+                codes = self.categories.setdefault(column, {})
+                value = codes.setdefault(value, len(codes))
+            elif isinstance(value, float) and value != value:
+                value = None
+            self.columns[column].append(value)
+
+    def close(self, report_data: Dict[str, Any]):
+        stats = {}
+        for column, values in self.columns.items():
+            present = [value for value in values if value is not None]
+            if present and column not in self.categories:
+                stats[column] = [min(present), max(present)]
+        
+        document = {
+            "version": 1,
+            "report_date": self.report_date,
+            "count": len(self.names),
+            "names": self.names,
+            "index": {name: row for row, name in enumerate(self.names)},
+            "columns": self.columns,
+            "categories": {column: list(codes) for column, codes in self.categories.items()},
+            "stats": stats,
+            "summary": report_data.get("summary", {})
         }
+        payload = json.dumps(document, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+        with open(self.path, "wb") as f:
+            f.write(payload)
+            self.size = f.tell()
         
+        if "gzip" in self.compression:
+            with open(self.path + ".gz", "wb") as f:
+                f.write(gzip.compress(payload, compresslevel=9))
+        if "brotli" in self.compression:
+            if brotli is None:
+                print("brotli is not installed; skipping .br output")
+            else:
+                with open(self.path + ".br", "wb") as f:
+                    f.write(brotli.compress(payload, quality=11))
+
+    def suffixes(self) -> List[str]:
+        return [""] + [".gz"] * ("gzip" in self.compression) + [".br"] * ("brotli" in self.compression and brotli is not None)
+
+
+class SurfaceWriter(ReportWriter):
+    """Writes interpolated metric surfaces over Syria for the map: a binary grid plus tiles.
+
+    The grid file holds one north-up raster per metric, back to back, as
+    little-endian uint16 codes (value = offset + code * scale, 65535 = no data).
+    The .json manifest next to it describes the grid, each metric's offset and
+    scale, and the tile layout. Tiles are the same codes cut into square blocks
+    under <name>_tiles/<version>/<metric>/<row>_<col>.bin; each report gets a new
+    version directory so cached tiles never go stale, and all-empty tiles are
+    not written.
+    """
+
+    streaming = True
+    label = "Surface output"
+
+    def __init__(self, path: str, metrics: Optional[List[str]] = None, resolution: float = SURFACE_RESOLUTION,
+                 boundary_path: Optional[str] = None, atomic: bool = False):
+        super().__init__(path, atomic)
+        self.metrics = metrics or SURFACE_METRICS
+        self.resolution = resolution
+        self.boundary_path = boundary_path
+        self.tile_root = os.path.splitext(self.target)[0] + "_tiles"
+        self.tile_dir = None
+        self.new_tiles = False
+        self.specs = [next(spec for spec in COMPACT_REPORT_COLUMNS if spec[0] == metric) for metric in self.metrics]
+        self.coordinates = []
+        self.values = []
+
+    def open(self, report_data: Dict[str, Any]):
+        self.report_date = report_data["metadata"]["report_date"]
+
+    def write_city(self, city_name: str, city_data: Dict[str, Any]):
+        coordinates = city_data.get("coordinates") or {}
+        if coordinates.get("latitude") is None or coordinates.get("longitude") is None:
+            return
+        self.coordinates.append((coordinates["latitude"], coordinates["longitude"]))
+        row = []
+        for _, section, key in self.specs:
+            value = (city_data.get(section) or {}).get(key)
+            row.append(value if isinstance(value, (int, float)) else None)
+        self.values.append(row)
+
+    def close(self, report_data: Dict[str, Any]):
+        started = time.perf_counter()
+        grid_lats, grid_lons = surface_grid(self.resolution)
+        mask = None
+        if self.boundary_path:
+            with open(self.boundary_path, encoding="utf-8") as f:
+                features = json.load(f)["features"]
+            mask = np.zeros((len(grid_lats), len(grid_lons)), dtype=bool)
+            for feature in features:
+                mask |= rings_mask(grid_lats, grid_lons, polygon_rings(feature["geometry"]))
+        
+        points = np.array(self.coordinates, dtype=np.float64).reshape(-1, 2)
+        values = np.array(self.values, dtype=np.float64).reshape(-1, len(self.metrics))
+        surfaces = interpolate_surfaces(points[:, 0], points[:, 1],
+                                        {metric: values[:, column] for column, metric in enumerate(self.metrics)},
+                                        grid_lats, grid_lons, mask)
+        
+        codes, encodings = {}, {}
+        for metric in self.metrics:
+            surface = surfaces[metric]
+            present = ~np.isnan(surface)
+            low = round(float(surface[present].min()), 6) if present.any() else 0.0
+            high = round(float(surface[present].max()), 6) if present.any() else 0.0
+            scale = (high - low) / (SURFACE_NODATA - 1) or 1.0
+            quantized = np.full(surface.shape, SURFACE_NODATA, dtype="<u2")
+            quantized[present] = np.clip(np.rint((surface[present] - low) / scale), 0, SURFACE_NODATA - 1)
+            codes[metric] = quantized
+            encodings[metric] = {"offset": low, "scale": scale, "min": low, "max": high}
+        
+        payload = b"".join(codes[metric].tobytes() for metric in self.metrics)
+        version = hashlib.sha1(payload + json.dumps(encodings, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        with open(self.path, "wb") as f:
+            f.write(payload)
+            self.size = f.tell()
+        
+        self.tile_dir = os.path.join(self.tile_root, version)
+        self.new_tiles = not os.path.isdir(self.tile_dir)
+        height, width = len(grid_lats), len(grid_lons)
+        tile_rows, tile_columns = -(-height // SURFACE_TILE_SIZE), -(-width // SURFACE_TILE_SIZE)
+        for metric in self.metrics:
+            os.makedirs(os.path.join(self.tile_dir, metric), exist_ok=True)
+            padded = np.full((tile_rows * SURFACE_TILE_SIZE, tile_columns * SURFACE_TILE_SIZE), SURFACE_NODATA, dtype="<u2")
+            padded[:height, :width] = codes[metric]
+            tiles = padded.reshape(tile_rows, SURFACE_TILE_SIZE, tile_columns, SURFACE_TILE_SIZE).swapaxes(1, 2)
+            for tile_row, tile_column in np.argwhere((tiles != SURFACE_NODATA).any(axis=(2, 3))).tolist():
+                with open(os.path.join(self.tile_dir, metric, f"{tile_row}_{tile_column}.bin"), "wb") as f:
+                    f.write(tiles[tile_row, tile_column].tobytes())
+        
+        south, west, north, east = SYRIA_BBOX
+        manifest = {
+            "version": version,
+            "report_date": self.report_date,
+            "bbox": {"south": south, "west": west, "north": north, "east": east},
+            "resolution": self.resolution,
+            "width": width,
+            "height": height,
+            "dtype": "uint16le",
+            "nodata": SURFACE_NODATA,
+            "method": {"name": "idw", "neighbors": IDW_NEIGHBORS, "power": IDW_POWER, "locations": len(points)},
+            "metrics": {metric: {**encodings[metric], "byte_offset": index * width * height * 2}
+                        for index, metric in enumerate(self.metrics)},
+            "tiles": {
+                "size": SURFACE_TILE_SIZE,
+                "rows": tile_rows,
+                "columns": tile_columns,
+                "path": os.path.relpath(self.tile_dir, os.path.dirname(self.target) or ".") + "/{metric}/{row}_{column}.bin"
+            }
+        }
+        with open(self.path + ".json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        if self.path == self.target:
+            self.prune_tiles()
+        print(f"Interpolated {len(self.metrics)} surfaces on a {height}x{width} grid "
+              f"from {len(points)} locations in {time.perf_counter() - started:.3f}s")
+
+    def prune_tiles(self):
+        """Remove tile versions other than the one just written"""
+        for version in os.listdir(self.tile_root):
+            path = os.path.join(self.tile_root, version)
+            if path != self.tile_dir and os.path.isdir(path):
+                shutil.rmtree(path)
+
+    def abort(self):
+        super().abort()
+        if self.tile_dir and self.new_tiles and self.path != self.target and os.path.isdir(self.tile_dir):
+            shutil.rmtree(self.tile_dir)
+
+    def suffixes(self) -> List[str]:
+        # The manifest goes last, so it only ever points at tiles and a grid already in place
+        return ["", ".json"]
+
+    def publish(self):
+        super().publish()
+        if self.path != self.target:
+            self.prune_tiles()
+
+
+REPORT_WRITERS = {"json": ReportWriter, "json-stream": StreamingJsonReportWriter, "jsonl": JsonLinesReportWriter}
+
+
+class SyriaEnvironmentalDataAggregator:
+    def __init__(self, max_workers: int = 1, host_limits: Optional[Dict[str, Dict[str, float]]] = None,
+                 batch_size: int = 1, cache: Optional[ResponseCache] = None, max_retries: int = 3,
+                 location_source: Optional[Callable[[], Iterator[Tuple[str, Dict]]]] = None,
+                 chunk_size: int = 500, snap_resolution: float = 0.1,
+                 output_file: str = "syria_environmental_data_report.json", output_format: str = "json",
+                 compact_output: Optional[str] = None, compact_compression: Optional[List[str]] = None,
+                 journal: Optional[RunJournal] = None, resume: bool = False, resume_max_age_hours: float = 24,
+                 metrics_output: Optional[str] = None, prometheus_output: Optional[str] = None,
+                 base_urls: Optional[Dict[str, str]] = None, climatology_years: Optional[int] = None,
+                 climatology_chunk_years: int = 5, shard: Optional[Tuple[int, int]] = None, shard_by: str = "hash",
+                 surface_output: Optional[str] = None, surface_metrics: Optional[List[str]] = None,
+                 surface_resolution: float = SURFACE_RESOLUTION, surface_boundary: Optional[str] = None,
+                 hourly_hours: Optional[int] = None):
+        self.max_workers = max_workers
+        self.batch_size = max(1, batch_size)
+        self.cache = cache
+        self.location_source = location_source
+        self.chunk_size = max(1, chunk_size)
+        self.snap_resolution = snap_resolution
+        self.interrupted = False
+        self.output_file = output_file
+        self.output_format = output_format
+        self.compact_output = compact_output
+        self.compact_compression = compact_compression
+        self.surface_output = surface_output
+        self.surface_metrics = surface_metrics
+        self.surface_resolution = surface_resolution
+        self.surface_boundary = surface_boundary
+        self.make_writers()
+        self.journal = journal
+        self.metrics_output = metrics_output
+        self.climatology_years = climatology_years
+        self.climatology_chunk_years = max(1, climatology_chunk_years)
+        self.hourly_hours = hourly_hours
+        if journal is not None:
+            journal.config = json.dumps({
+                "history": "climatology" if climatology_years else "recent",
+                "climatology_years": climatology_years,
+                "hourly_hours": hourly_hours,
+            }, sort_keys=True)
+        self.prometheus_output = prometheus_output
+        self.resume = resume
+        self.resume_max_age_hours = resume_max_age_hours
+        self.throttle = HostThrottle(host_limits)
+        self.metrics = RunMetrics()
+        self.transport = HttpTransport(
+            self.throttle,
+            metrics=self.metrics,
+            base_urls=base_urls,
+            max_retries=max_retries,
+            pool_size=max(max_workers, *(int(limit["concurrency"]) for limit in self.throttle.host_limits.values()))
+        )
+        self.major_cities = {name: dict(info) for name, info in MAJOR_CITIES.items()}
+        self.shard = shard
+        self.shard_by = shard_by
+        if shard is not None:
+            if location_source is not None:
+                self.location_source = lambda: (item for item in location_source() if self.in_shard(*item))
+            else:
+                self.major_cities = {name: info for name, info in self.major_cities.items() if self.in_shard(name, info)}
+        self.reset_report(len(self.major_cities))
+
+    def in_shard(self, city_name: str, city_info: Dict) -> bool:
+        index, count = self.shard
+        return shard_of(city_name, city_info, count, self.shard_by) == index
+
+    def make_writers(self, atomic: bool = False):
+        """Create the report writer and any extra (compact, surface) writers for one report"""
+        self.writer = REPORT_WRITERS[self.output_format](self.output_file, atomic)
+        self.extra_writers = []
+        if self.compact_output:
+            self.extra_writers.append(CompactReportWriter(self.compact_output, self.compact_compression, atomic))
+        if self.surface_output:
+            self.extra_writers.append(SurfaceWriter(self.surface_output, self.surface_metrics, self.surface_resolution,
+                                                    self.surface_boundary, atomic))
+
+    def reset_report(self, cities_analyzed: Optional[int]):
+        """Start a fresh report document and summary accumulators"""
         self.report_data = {
             "metadata": {
                 "country": "Syria",
                 "report_date": datetime.now().isoformat(),
                 "data_sources": ["Open-Meteo", "NASA POWER", "World Bank Climate API"],
-                "cities_analyzed": len(self.major_cities)
+                "cities_analyzed": cities_analyzed
             },
             "cities": {}
         }
+        self.location_count = cities_analyzed
+        self.summary_inputs = {"drought_risks": {}, "temperature_trend_total": 0, "temperature_trend_count": 0}
+        self.cities_emitted = 0
+
+    def http_get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: int = 30,
+                 headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """Issue a GET request over the pooled session, within the per-host limits and with retries"""
+        return self.transport.get(url, params=params, timeout=timeout, headers=headers)
+
+    def decode_json(self, response: requests.Response, url: str) -> Any:
+        """Parse a response body as JSON, timing the decode against the endpoint it was requested from"""
+        started = time.perf_counter()
+        payload = response.json()
+        self.metrics.record_decode(url, time.perf_counter() - started)
+        return payload
+
+    def conditional_get_json(self, url: str, timeout: int = 30) -> Optional[Any]:
+        """GET a mostly static JSON document, revalidating the cached copy with ETag/Last-Modified.
+
+        Returns None when the server answers with anything other than 200 or 304.
+        """
+        key = ResponseCache.make_key(url, 0, 0, "conditional")
+        entry = self.cache.get(key) if self.cache else None
+        headers = {}
+        if entry:
+            if entry[0].get("etag"):
+                headers["If-None-Match"] = entry[0]["etag"]
+            if entry[0].get("last_modified"):
+                headers["If-Modified-Since"] = entry[0]["last_modified"]
+        
+        response = self.http_get(url, timeout=timeout, headers=headers)
+        if response.status_code == 304 and entry:
+            self.cache.record("hits", bytes_saved=len(json.dumps(entry[0]["body"])))
+            self.cache.put(key, url, entry[0])
+            return entry[0]["body"]
+        if response.status_code != 200:
+            return None
+        
+        body = self.decode_json(response, url)
+        if self.cache:
+            self.cache.record("misses", len(response.content))
+            self.cache.put(key, url, {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "body": body
+            })
+        return body
 
     def fetch_openmeteo_current_weather(self, lat: float, lon: float) -> Dict[str, Any]:
         """Fetch current weather data from Open-Meteo API"""
-        base_url = "https://api.open-meteo.com/v1/forecast"
+        return self.fetch_openmeteo_current_weather_batch([(lat, lon)])[0]
+
+    def fetch_openmeteo_current_weather_batch(self, locations: List[Tuple[float, float]]) -> List[Dict[str, Any]]:
+        """Fetch current weather for several locations in one Open-Meteo request"""
         params = {
-            "latitude": lat,
-            "longitude": lon,
-            "current": "temperature_2m,relative_humidity_2m,apparent_temperature,is_day,precipitation,rain,showers,snowfall,weather_code,cloud_cover,pressure_msl,surface_pressure,wind_speed_10m,wind_direction_10m,wind_gusts_10m",
-            "daily": "temperature_2m_max,temperature_2m_min,temperature_2m_mean,apparent_temperature_max,apparent_temperature_min,sunrise,sunset,daylight_duration,sunshine_duration,precipitation_sum,rain_sum,precipitation_hours,wind_speed_10m_max,wind_gusts_10m_max,wind_direction_10m_dominant",
+            **self.openmeteo_coordinate_params(locations),
+            "current": OPENMETEO_CURRENT_VARIABLES,
+            "daily": OPENMETEO_FORECAST_DAILY_VARIABLES,
             "timezone": "auto"
         }
         
         try:
-            response = requests.get(base_url, params=params, timeout=30)
+            response = self.http_get(OPENMETEO_FORECAST_URL, params=params, timeout=30)
             response.raise_for_status()
-            return response.json()
+            return self.split_openmeteo_batch(self.decode_json(response, OPENMETEO_FORECAST_URL), len(locations))
         except Exception as e:
             print(f"Error fetching current weather: {e}")
-            return {}
+            return [{} for _ in locations]
+
+    def fetch_hourly(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Fetch the hourly weather and air-quality series for the hourly outlook"""
+        return self.fetch_hourly_batch([(lat, lon)])[0]
+
+    def fetch_hourly_batch(self, locations: List[Tuple[float, float]]) -> List[Dict[str, Any]]:
+        """Fetch hourly weather and air quality for several locations, one request per endpoint.
+
+        Both series run in UTC from HOURLY_WARMUP_HOURS before the current hour to
+        hourly_hours after it, so every location shares one time axis. Air quality
+        is optional: where it fails, the outlook falls back to a ventilation estimate.
+        """
+        params = {
+            **self.openmeteo_coordinate_params(locations),
+            "past_hours": HOURLY_WARMUP_HOURS,
+            "forecast_hours": self.hourly_hours
+        }
+        try:
+            response = self.http_get(OPENMETEO_FORECAST_URL, timeout=30, params={
+                **params, "hourly": OPENMETEO_HOURLY_VARIABLES, "wind_speed_unit": "ms"
+            })
+            response.raise_for_status()
+            weather = self.split_openmeteo_batch(self.decode_json(response, OPENMETEO_FORECAST_URL), len(locations))
+        except Exception as e:
+            print(f"Error fetching hourly weather: {e}")
+            return [{} for _ in locations]
+        
+        try:
+            response = self.http_get(OPENMETEO_AIR_QUALITY_URL, timeout=30, params={
+                **params, "hourly": OPENMETEO_AIR_QUALITY_VARIABLES
+            })
+            response.raise_for_status()
+            air_quality = self.split_openmeteo_batch(self.decode_json(response, OPENMETEO_AIR_QUALITY_URL), len(locations))
+        except Exception as e:
+            print(f"Error fetching air quality forecast, estimating from ventilation: {e}")
+            air_quality = [{} for _ in locations]
+        
+        return [
+            {"hourly": weather_payload.get("hourly", {}), "air_quality": air_quality_payload.get("hourly", {})}
+            for weather_payload, air_quality_payload in zip(weather, air_quality)
+        ]
 
     def fetch_openmeteo_historical_weather(self, lat: float, lon: float, years: int = 5) -> Dict[str, Any]:
         """Fetch historical weather data from Open-Meteo API"""
-        base_url = "https://archive-api.open-meteo.com/v1/archive"
+        return self.fetch_openmeteo_historical_weather_batch([(lat, lon)], years)[0]
+
+    def fetch_openmeteo_historical_weather_batch(self, locations: List[Tuple[float, float]], years: int = 5) -> List[Dict[str, Any]]:
+        """Fetch historical weather for several locations in one Open-Meteo archive request.
+
+        Locations with a cached archive only request the days after their last
+        complete cached day; locations sharing a resume date share one request.
+        """
         end_date = datetime.now()
         start_date = end_date - timedelta(days=years * 365)
+        start, end = start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+        
+        results = [None] * len(locations)
+        cached = [self.cache_lookup(OPENMETEO_ARCHIVE_URL, lat, lon, OPENMETEO_ARCHIVE_DAILY_VARIABLES)
+                  for lat, lon in locations]
+        fetch_from = {}
+        for index, entry in enumerate(cached):
+            resume = self.archive_resume_date(entry[0] if entry else None, start)
+            if resume > end:
+                results[index] = self.trim_daily_payload(entry[0], start, end)
+                self.cache.record("hits", bytes_saved=len(json.dumps(results[index])))
+            else:
+                fetch_from[index] = resume
         
+        groups = {}
+        for index, resume in fetch_from.items():
+            groups.setdefault(resume, []).append(index)
+        
+        for resume, pending in groups.items():
+            self.fetch_archive_range(locations, pending, resume, start, end, cached, results)
+        
+        return results
+
+    def fetch_archive_range(self, locations: List[Tuple[float, float]], pending: List[int], resume: str,
+                            start: str, end: str, cached: List[Optional[Tuple[Dict[str, Any], float]]],
+                            results: List[Optional[Dict[str, Any]]]):
+        """Fetch archive days [resume, end] for the pending locations and merge them into results"""
         params = {
-            "latitude": lat,
-            "longitude": lon,
-            "start_date": start_date.strftime("%Y-%m-%d"),
-            "end_date": end_date.strftime("%Y-%m-%d"),
-            "daily": "temperature_2m_max,temperature_2m_min,temperature_2m_mean,precipitation_sum,wind_speed_10m_max,et0_fao_evapotranspiration,surface_pressure_mean",
+            **self.openmeteo_coordinate_params([locations[i] for i in pending]),
+            "start_date": resume,
+            "end_date": end,
+            "daily": OPENMETEO_ARCHIVE_DAILY_VARIABLES,
             "timezone": "auto"
         }
         
         try:
-            response = requests.get(base_url, params=params, timeout=60)
+            response = self.http_get(OPENMETEO_ARCHIVE_URL, params=params, timeout=60 + 10 * (len(pending) - 1))
             response.raise_for_status()
-            return response.json()
+            fresh = self.split_openmeteo_batch(self.decode_json(response, OPENMETEO_ARCHIVE_URL), len(pending))
         except Exception as e:
             print(f"Error fetching historical weather: {e}")
-            return {}
+            for index in pending:
+                # Serve the stale cached history rather than nothing
+                results[index] = self.trim_daily_payload(cached[index][0], start, end) if cached[index] else {}
+            return
+        
+        bytes_each = len(response.content) // len(pending)
+        for index, payload in zip(pending, fresh):
+            lat, lon = locations[index]
+            key = ResponseCache.make_key(OPENMETEO_ARCHIVE_URL, lat, lon, OPENMETEO_ARCHIVE_DAILY_VARIABLES)
+            if resume > start and "daily" in payload:
+                payload = {**payload, "daily": self.merge_daily_series(cached[index][0]["daily"], payload["daily"], start, end)}
+                self.cache.record("partial_hits", bytes_each, len(json.dumps(payload)) - bytes_each)
+                self.cache.put(key, OPENMETEO_ARCHIVE_URL, payload, created_at=cached[index][1])
+            elif self.cache:
+                self.cache.record("misses", bytes_each)
+                if "daily" in payload:
+                    self.cache.put(key, OPENMETEO_ARCHIVE_URL, payload)
+            results[index] = payload
+
+    def cache_lookup(self, endpoint: str, lat: float, lon: float, variables: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return the cached (payload, created_at) for a location, if caching is enabled"""
+        if not self.cache:
+            return None
+        return self.cache.get(ResponseCache.make_key(endpoint, lat, lon, variables))
+
+    def archive_resume_date(self, cached: Optional[Dict[str, Any]], start: str) -> str:
+        """First day that must be fetched to bring a cached archive payload up to date"""
+        daily = (cached or {}).get("daily", {})
+        times = daily.get("time") or []
+        if not times or times[0] > start:
+            return start
+        
+        series = [values for key, values in daily.items() if key != "time"]
+        complete = [day for i, day in enumerate(times) if any(values[i] is not None for values in series)]
+        if not complete:
+            return start
+        if complete[-1] >= times[-1] and times[-1] >= datetime.now().strftime("%Y-%m-%d"):
+            return shift_date(times[-1], 1, "%Y-%m-%d")
+        return max(start, shift_date(complete[-1], -CACHE_REFRESH_OVERLAP_DAYS, "%Y-%m-%d"))
+
+    def merge_daily_series(self, cached: Dict[str, List], fresh: Dict[str, List], start: str, end: str) -> Dict[str, List]:
+        """Combine cached daily columns with freshly fetched ones, fresh values winning on overlap"""
+        first_fresh = fresh["time"][0] if fresh.get("time") else end
+        keep = [i for i, day in enumerate(cached.get("time", [])) if start <= day < first_fresh]
+        return {
+            key: [cached[key][i] for i in keep] + list(values) if key in cached else list(values)
+            for key, values in fresh.items()
+        }
+
+    def trim_daily_payload(self, payload: Dict[str, Any], start: str, end: str) -> Dict[str, Any]:
+        """Restrict an Open-Meteo daily payload to the [start, end] date window"""
+        daily = payload["daily"]
+        keep = [i for i, day in enumerate(daily["time"]) if start <= day <= end]
+        return {**payload, "daily": {key: [values[i] for i in keep] for key, values in daily.items()}}
+
+    def openmeteo_coordinate_params(self, locations: List[Tuple[float, float]]) -> Dict[str, Any]:
+        """Build Open-Meteo latitude/longitude params, comma-separated for multiple locations"""
+        if len(locations) == 1:
+            return {"latitude": locations[0][0], "longitude": locations[0][1]}
+        return {
+            "latitude": ",".join(str(lat) for lat, _ in locations),
+            "longitude": ",".join(str(lon) for _, lon in locations)
+        }
+
+    def split_openmeteo_batch(self, payload: Any, expected: int) -> List[Dict[str, Any]]:
+        """Split an Open-Meteo response into per-location payloads in request order"""
+        results = payload if isinstance(payload, list) else [payload]
+        if len(results) != expected:
+            raise ValueError(f"Open-Meteo returned {len(results)} locations, expected {expected}")
+        return results
+
+    def climatology_window(self) -> Tuple[int, int]:
+        """First and last complete calendar years of the climatology baseline"""
+        last_year = datetime.now().year - 1
+        return max(OPENMETEO_ARCHIVE_FIRST_YEAR, last_year - self.climatology_years + 1), last_year
+
+    def fetch_climatology(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Fetch and reduce a multi-decade archive history for one location"""
+        return self.fetch_climatology_batch([(lat, lon)])[0]
+
+    def fetch_climatology_batch(self, locations: List[Tuple[float, float]]) -> List[Dict[str, Any]]:
+        """Fetch a multi-decade archive history for several locations and reduce it to climatology statistics.
+
+        The baseline is split into year chunks fetched in parallel; each chunk is
+        folded into per-location accumulators as it arrives, so only the chunks in
+        flight are ever held in memory. Returns {"climatology": analysis} payloads
+        that analyze_histories passes through unchanged.
+        """
+        first_year, last_year = self.climatology_window()
+        accumulators = [ClimatologyAccumulator(first_year, last_year) for _ in locations]
+        spans = [(year, min(year + self.climatology_chunk_years - 1, last_year))
+                 for year in range(first_year, last_year + 1, self.climatology_chunk_years)]
+        
+        with ThreadPoolExecutor(max_workers=min(len(spans), max(self.max_workers, 4))) as executor:
+            futures = [executor.submit(self.fetch_climatology_chunk, locations, f"{start}-01-01", f"{end}-12-31")
+                       for start, end in spans]
+            for future in as_completed(futures):
+                for accumulator, chunk in zip(accumulators, future.result()):
+                    if chunk is not None:
+                        accumulator.add(*chunk)
+        
+        return [{"climatology": self.climatology_analysis(accumulator)} if accumulator.chunks else {}
+                for accumulator in accumulators]
+
+    def fetch_climatology_chunk(self, locations: List[Tuple[float, float]], start: str,
+                                end: str) -> List[Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]]:
+        """Fetch archive days [start, end] for the locations, parsed into float32 columns.
+
+        Past calendar years no longer change, so chunks are served from the
+        response cache when every location has them.
+        """
+        variables = OPENMETEO_ARCHIVE_DAILY_VARIABLES.split(",")
+        keys = [ResponseCache.make_key(OPENMETEO_ARCHIVE_URL, lat, lon, f"{OPENMETEO_ARCHIVE_DAILY_VARIABLES}@{start}/{end}")
+                for lat, lon in locations]
+        cached = [self.cache.get(key) for key in keys] if self.cache else [None] * len(locations)
+        if all(cached):
+            for entry in cached:
+                self.cache.record("hits", bytes_saved=len(json.dumps(entry[0])))
+            return [parse_daily_columns(entry[0]["daily"], variables) for entry in cached]
+        
+        params = {
+            **self.openmeteo_coordinate_params(locations),
+            "start_date": start,
+            "end_date": end,
+            "daily": OPENMETEO_ARCHIVE_DAILY_VARIABLES,
+            "timezone": "auto"
+        }
+        
+        try:
+            response = self.http_get(OPENMETEO_ARCHIVE_URL, params=params, timeout=60 + 10 * (len(locations) - 1))
+            response.raise_for_status()
+            fresh = self.split_openmeteo_batch(self.decode_json(response, OPENMETEO_ARCHIVE_URL), len(locations))
+        except Exception as e:
+            print(f"Error fetching climatology {start[:4]}-{end[:4]}: {e}")
+            return [parse_daily_columns(entry[0]["daily"], variables) if entry else None for entry in cached]
+        
+        bytes_each = len(response.content) // len(locations)
+        for key, payload in zip(keys, fresh):
+            if self.cache and "daily" in payload:
+                self.cache.record("misses", bytes_each)
+                self.cache.put(key, OPENMETEO_ARCHIVE_URL, payload)
+        return [parse_daily_columns(payload["daily"], variables) if "daily" in payload else None for payload in fresh]
+
+    def climatology_analysis(self, accumulator: ClimatologyAccumulator) -> Dict[str, Any]:
+        """Climate trends, drought risk and summary from a climatology accumulator, shaped like analyze_histories' output"""
+        trends = {}
+        temp_years, temperatures = accumulator.annual_series("temp")
+        if len(temp_years) > 1:
+            slope = least_squares_slopes(temp_years.astype(np.float64), temperatures, np.array([0]))[0]
+            trends["temperature_trend_celsius"] = round(slope * (temp_years[-1] - temp_years[0]), 2)
+            trends["temperature_change_rate_per_year"] = round(slope, 3)
+        
+        rain_years, rainfall = accumulator.annual_series("rain")
+        if len(rain_years) > 1:
+            slope = least_squares_slopes(rain_years.astype(np.float64), rainfall, np.array([0]))[0]
+            trends["rainfall_trend_mm"] = round(slope * (rain_years[-1] - rain_years[0]), 2)
+            trends["average_annual_rainfall_mm"] = round(rainfall.mean(), 2)
+        
+        totals = accumulator.totals
+        if totals["pressure_count"]:
+            trends["avg_surface_pressure_hpa"] = round(totals["pressure_sum"] / totals["pressure_count"], 1)
+        
+        drought_analysis = {}
+        if accumulator.monthly_rain_count.any():
+            with np.errstate(invalid="ignore", divide="ignore"):
+                monthly = accumulator.monthly_rain_sum / accumulator.monthly_rain_count
+            months = np.arange(1, 13)
+            drought_analysis["dry_season_months"] = months[monthly < 20].tolist()
+            drought_analysis["wet_season_months"] = months[monthly >= 20].tolist()
+            drought_analysis["annual_precipitation_mm"] = round(float(np.nansum(monthly)) * 30.44, 2)
+            drought_analysis.update(self.classify_drought(drought_analysis["annual_precipitation_mm"]))
+            if len(rain_years) > CLIMATOLOGY_RECENT_YEARS:
+                normal, spread = rainfall.mean(), rainfall.std(ddof=1)
+                recent = rainfall[-CLIMATOLOGY_RECENT_YEARS:].mean()
+                drought_analysis["recent_precipitation_percent_of_normal"] = round(recent / normal * 100, 1) if normal else None
+                drought_analysis["recent_precipitation_anomaly_zscore"] = (
+                    round((recent - normal) / (spread / np.sqrt(CLIMATOLOGY_RECENT_YEARS)), 2) if spread else None
+                )
+        
+        def average(key: str) -> Optional[float]:
+            return round(totals[f"{key}_sum"] / totals[f"{key}_count"], 2) if totals[f"{key}_count"] else None
+        
+        covered = np.flatnonzero(accumulator.yearly["temp_count"] + accumulator.yearly["rain_count"]) + accumulator.first_year
+        return {
+            "climate_trends": trends,
+            "drought_risk": drought_analysis,
+            "historical_summary": {
+                "period_start": f"{covered[0]}-01-01" if len(covered) else None,
+                "period_end": f"{covered[-1]}-12-31" if len(covered) else None,
+                "baseline_years": len(covered),
+                "avg_max_temp_c": average("tmax"),
+                "avg_min_temp_c": average("tmin"),
+                "total_precipitation_mm": round(totals["rain_total"], 2) if accumulator.yearly["rain_count"].any() else None,
+                "max_wind_speed_kmh": None if np.isnan(accumulator.max_wind) else round(float(accumulator.max_wind), 2),
+                "avg_surface_pressure_hpa": average("pressure")
+            }
+        }
 
     def fetch_nasa_power_climate(self, lat: float, lon: float) -> Dict[str, Any]:
         """Fetch climate and agricultural data from NASA POWER API"""
-        base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"
-        
         # Use dates that are definitely in the past and valid
         end_date = datetime.now() - timedelta(days=2)
         start_date = end_date - timedelta(days=365)
+        start, end = start_date.strftime("%Y%m%d"), end_date.strftime("%Y%m%d")
+        
+        entry = self.cache_lookup(NASA_POWER_URL, lat, lon, NASA_POWER_PARAMETERS)
+        fetch_start = self.nasa_resume_date(entry[0] if entry else None, start)
+        if fetch_start > end:
+            payload = self.trim_nasa_payload(entry[0], start, end)
+            self.cache.record("hits", bytes_saved=len(json.dumps(payload)))
+            return payload
         
         params = {
-            "parameters": "T2M_MAX,T2M_MIN,T2M,RH2M,PRECTOTCORR,WS10M",
+            "parameters": NASA_POWER_PARAMETERS,
             "community": "RE",  # Changed from AG to RE (Renewable Energy)
             "longitude": f"{lon:.2f}",
             "latitude": f"{lat:.2f}",
-            "start": start_date.strftime("%Y%m%d"),
-            "end": end_date.strftime("%Y%m%d"),
+            "start": fetch_start,
+            "end": end,
             "format": "JSON"
         }
         
         try:
-            response = requests.get(base_url, params=params, timeout=60)
+            response = self.http_get(NASA_POWER_URL, params=params, timeout=60)
             if response.status_code == 422:
                 print(f"NASA POWER API parameter issue - skipping (data available from Open-Meteo)")
                 return {"skipped": True, "reason": "API parameter validation failed"}
             response.raise_for_status()
-            return response.json()
+            payload = self.decode_json(response, NASA_POWER_URL)
         except requests.exceptions.RequestException as e:
+            if entry:
+                return self.trim_nasa_payload(entry[0], start, end)
             print(f"NASA POWER data unavailable (using Open-Meteo data instead): {str(e)[:100]}")
             return {"skipped": True, "reason": str(e)[:100]}
+        
+        if not self.cache or "properties" not in payload:
+            return payload
+        
+        key = ResponseCache.make_key(NASA_POWER_URL, lat, lon, NASA_POWER_PARAMETERS)
+        if fetch_start > start:
+            payload = self.merge_nasa_payload(entry[0], payload, start, end)
+            self.cache.record("partial_hits", len(response.content), len(json.dumps(payload)) - len(response.content))
+            self.cache.put(key, NASA_POWER_URL, payload, created_at=entry[1])
+        else:
+            self.cache.record("misses", len(response.content))
+            self.cache.put(key, NASA_POWER_URL, payload)
+        return payload
+
+    def nasa_resume_date(self, cached: Optional[Dict[str, Any]], start: str) -> str:
+        """First day that must be fetched to bring a cached NASA POWER payload up to date"""
+        parameters = (cached or {}).get("properties", {}).get("parameter", {})
+        days = sorted({day for series in parameters.values() for day in series})
+        if not days or days[0] > start:
+            return start
+        
+        complete = [day for day in days
+                    if any(series.get(day, NASA_POWER_FILL_VALUE) != NASA_POWER_FILL_VALUE for series in parameters.values())]
+        if not complete:
+            return start
+        if complete[-1] == days[-1] and days[-1] >= (datetime.now() - timedelta(days=2)).strftime("%Y%m%d"):
+            return shift_date(days[-1], 1, "%Y%m%d")
+        return max(start, shift_date(complete[-1], -CACHE_REFRESH_OVERLAP_DAYS, "%Y%m%d"))
+
+    def merge_nasa_payload(self, cached: Dict[str, Any], fresh: Dict[str, Any], start: str, end: str) -> Dict[str, Any]:
+        """Combine cached NASA POWER parameter series with a freshly fetched tail"""
+        cached_parameters = cached["properties"]["parameter"]
+        merged = {}
+        for name, series in fresh["properties"]["parameter"].items():
+            combined = {day: value for day, value in cached_parameters.get(name, {}).items() if start <= day}
+            combined.update(series)
+            merged[name] = {day: combined[day] for day in sorted(combined) if day <= end}
+        return {**fresh, "properties": {**fresh["properties"], "parameter": merged}}
+
+    def trim_nasa_payload(self, payload: Dict[str, Any], start: str, end: str) -> Dict[str, Any]:
+        """Restrict a NASA POWER payload to the [start, end] date window"""
+        parameters = {
+            name: {day: value for day, value in series.items() if start <= day <= end}
+            for name, series in payload["properties"]["parameter"].items()
+        }
+        return {**payload, "properties": {**payload["properties"], "parameter": parameters}}
 
     def fetch_world_bank_climate(self) -> Dict[str, Any]:
         """Fetch climate data from World Bank Climate Data API for Syria"""
@@ -117,14 +1867,14 @@ class SyriaEnvironmentalDataAggregator:
             precipitation_url = f"{base_url}/SYR/prcp/data.json"
             temperature_url = f"{base_url}/SYR/tas/data.json"
             
-            precip_response = requests.get(precipitation_url, timeout=30)
-            temp_response = requests.get(temperature_url, timeout=30)
+            precipitation = self.conditional_get_json(precipitation_url, timeout=30)
+            temperature = self.conditional_get_json(temperature_url, timeout=30)
             
-            if precip_response.status_code == 200:
-                climate_data["precipitation"] = precip_response.json()
+            if precipitation is not None:
+                climate_data["precipitation"] = precipitation
             
-            if temp_response.status_code == 200:
-                climate_data["temperature"] = temp_response.json()
+            if temperature is not None:
+                climate_data["temperature"] = temperature
                 
         except Exception as e:
             print(f"World Bank climate data unavailable: {e}")
@@ -133,38 +1883,277 @@ class SyriaEnvironmentalDataAggregator:
 
     def calculate_climate_trends(self, historical_data: Dict) -> Dict[str, Any]:
         """Calculate climate trends from historical data"""
-        if not historical_data or "daily" not in historical_data:
-            return {}
+        return self.analyze_histories({"city": historical_data}).get("city", {}).get("climate_trends", {})
+
+    def build_history_frame(self, histories: Dict[str, Dict]) -> Tuple[pd.DataFrame, Dict[str, set]]:
+        """Load every city's daily history into one long-format frame.
+
+        Returns the frame (city, date, year, month and one column per variable,
+        sorted by city then date) and the set of variables each city actually had.
+        Dates are parsed once per distinct day rather than once per city.
+        """
+        counts, times, columns, available = [], [], {}, {}
+        for city_name, payload in histories.items():
+            daily = (payload or {}).get("daily")
+            if not daily or "time" not in daily:
+                continue
+            
+            available[city_name] = {key for key in daily if key != "time"}
+            counts.append(len(daily["time"]))
+            times.extend(daily["time"])
+            for key in available[city_name]:
+                columns.setdefault(key, {})[city_name] = daily[key]
         
-        daily_data = historical_data["daily"]
-        df = pd.DataFrame(daily_data)
+        if not available:
+            return pd.DataFrame(), available
         
-        trends = {}
+        codes, unique_days = pd.factorize(pd.Index(times))
+        dates = pd.DatetimeIndex(pd.to_datetime(unique_days))
+        
+        frame = pd.DataFrame({
+            "city": pd.Categorical.from_codes(np.repeat(np.arange(len(counts)), counts), categories=list(available)),
+            "date": dates[codes],
+            "year": dates.year[codes],
+            "month": dates.month[codes]
+        })
+        for key, per_city in columns.items():
+            frame[key] = np.concatenate([
+                np.asarray(per_city.get(city_name, [None] * count), dtype=float)
+                for city_name, count in zip(available, counts)
+            ])
+        
+        return frame, available
+
+    def analyze_histories(self, histories: Dict[str, Dict]) -> Dict[str, Dict[str, Any]]:
+        """Compute climate trends, drought risk and historical summaries for many cities at once.
+
+        Each statistic is a single grouped pass over the long-format frame; the
+        per-city dicts match what the per-city analysis has always produced.
+        Climatology payloads (already reduced by fetch_climatology_batch) are
+        passed through as they are.
+        """
+        frame, available = self.build_history_frame(histories)
+        results = {
+            city_name: (payload or {}).get("climatology") or {"climate_trends": {}, "drought_risk": {}}
+            for city_name, payload in histories.items()
+        }
+        if frame.empty:
+            return results
+        
+        city_codes = frame["city"].cat.codes.to_numpy()
+        starts = np.flatnonzero(np.r_[True, city_codes[1:] != city_codes[:-1]])
+        by_city_year = frame.groupby(["city", "year"], observed=True, sort=True)
+        summary_columns = ["temperature_2m_max", "temperature_2m_min", "precipitation_sum",
+                           "wind_speed_10m_max", "surface_pressure_mean"]
+        sums, means, maxes = {}, {}, {}
+        for key in summary_columns:
+            if key in frame.columns:
+                values = frame[key].to_numpy()
+                totals, averages = self.segment_sum_and_mean(values, starts)
+                sums[key] = dict(zip(available, totals))
+                means[key] = dict(zip(available, averages))
+                maxes[key] = dict(zip(available, np.fmax.reduceat(values, starts)))
+        
+        # The window starts and ends mid-year; a partial year's mean or total carries
+        # the seasons it happens to cover, so trends only use complete calendar years
+        days_per_year = by_city_year.size()
+        calendar_years = days_per_year.index.get_level_values("year").to_numpy()
+        leap = (calendar_years % 4 == 0) & ((calendar_years % 100 != 0) | (calendar_years % 400 == 0))
+        complete = days_per_year >= np.where(leap, 366, 365)
+        
+        def trend(yearly: pd.Series) -> Tuple[Dict[str, float], Dict[str, float]]:
+            """Least-squares slope per city of a yearly series, and the span of years it covers"""
+            if yearly.empty:
+                return {}, {}
+            codes = yearly.index.codes[0]
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            years = yearly.index.get_level_values("year").to_numpy(dtype=np.float64)
+            values = yearly.to_numpy(dtype=np.float64)
+            covered = np.where(np.isnan(values), np.nan, years)
+            spans = np.fmax.reduceat(covered, starts) - np.fmin.reduceat(covered, starts)
+            cities = yearly.index.get_level_values("city")[starts]
+            return dict(zip(cities, least_squares_slopes(years, values, starts))), dict(zip(cities, spans))
+        
+        def per_city(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+            codes = series.index.codes[0]
+            return self.segment_sum_and_mean(series.to_numpy(), np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]))
+        
+        if "temperature_2m_mean" in frame.columns:
+            temp_slope, temp_span = trend(by_city_year["temperature_2m_mean"].mean()[complete])
+        if "precipitation_sum" in frame.columns:
+            yearly_rainfall = by_city_year["precipitation_sum"].sum()[complete]
+            rain_slope, rain_span = trend(yearly_rainfall)
+            rain_mean = {} if yearly_rainfall.empty else dict(
+                zip(yearly_rainfall.index.get_level_values("city").unique(), per_city(yearly_rainfall)[1])
+            )
+            monthly_rainfall = frame.groupby(["city", "month"], observed=True, sort=True)["precipitation_sum"].mean()
+            monthly_total = dict(zip(available, per_city(monthly_rainfall)[0]))
         
-        if "temperature_2m_mean" in df.columns:
-            df["date"] = pd.to_datetime(df["time"])
-            df["year"] = df["date"].dt.year
-            df["month"] = df["date"].dt.month
+        for city_name, variables in available.items():
+            trends = {}
+            if "temperature_2m_mean" in variables and temp_span.get(city_name, 0) > 0:
+                trends["temperature_trend_celsius"] = round(temp_slope[city_name] * temp_span[city_name], 2)
+                trends["temperature_change_rate_per_year"] = round(temp_slope[city_name], 3)
             
-            yearly_avg_temp = df.groupby("year")["temperature_2m_mean"].mean()
+            if "precipitation_sum" in variables and rain_span.get(city_name, 0) > 0:
+                trends["rainfall_trend_mm"] = round(rain_slope[city_name] * rain_span[city_name], 2)
+                trends["average_annual_rainfall_mm"] = round(rain_mean[city_name], 2)
             
-            if len(yearly_avg_temp) > 1:
-                temp_change = yearly_avg_temp.iloc[-1] - yearly_avg_temp.iloc[0]
-                trends["temperature_trend_celsius"] = round(temp_change, 2)
-                trends["temperature_change_rate_per_year"] = round(temp_change / (len(yearly_avg_temp) - 1), 3)
-        
-        if "precipitation_sum" in df.columns:
-            yearly_total_rainfall = df.groupby("year")["precipitation_sum"].sum()
+            if "surface_pressure_mean" in variables:
+                trends["avg_surface_pressure_hpa"] = round(means["surface_pressure_mean"][city_name], 1)
+            
+            drought_analysis = {}
+            if "precipitation_sum" in variables:
+                months = monthly_rainfall.loc[city_name]
+                drought_analysis["dry_season_months"] = months[months < 20].index.tolist()
+                drought_analysis["wet_season_months"] = months[months >= 20].index.tolist()
+                drought_analysis["annual_precipitation_mm"] = round(monthly_total[city_name] * 30.44, 2)
+                drought_analysis.update(self.classify_drought(drought_analysis["annual_precipitation_mm"]))
             
-            if len(yearly_total_rainfall) > 1:
-                rainfall_change = yearly_total_rainfall.iloc[-1] - yearly_total_rainfall.iloc[0]
-                trends["rainfall_trend_mm"] = round(rainfall_change, 2)
-                trends["average_annual_rainfall_mm"] = round(yearly_total_rainfall.mean(), 2)
+            def summarize(table: Dict[str, Dict[str, Any]], key: str):
+                return round(table[key][city_name], 2) if key in variables else None
+            
+            results[city_name] = {
+                "climate_trends": trends,
+                "drought_risk": drought_analysis,
+                "historical_summary": {
+                    "period_start": histories[city_name]["daily"]["time"][0],
+                    "period_end": histories[city_name]["daily"]["time"][-1],
+                    "avg_max_temp_c": summarize(means, "temperature_2m_max"),
+                    "avg_min_temp_c": summarize(means, "temperature_2m_min"),
+                    "total_precipitation_mm": summarize(sums, "precipitation_sum"),
+                    "max_wind_speed_kmh": summarize(maxes, "wind_speed_10m_max"),
+                    "avg_surface_pressure_hpa": summarize(means, "surface_pressure_mean")
+                }
+            }
+        
+        return results
+
+    def segment_sum_and_mean(self, values: np.ndarray, starts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """NaN-skipping sums and means over contiguous segments.
+
+        Each segment is summed with ndarray.sum, exactly as Series.sum/mean do, so
+        rounded results match the per-city analysis to the last digit.
+        """
+        filled = np.where(np.isnan(values), 0.0, values)
+        counts = np.add.reduceat((~np.isnan(values)).astype(np.int64), starts)
+        totals = np.array([segment.sum() for segment in np.split(filled, starts[1:])])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            averages = totals / counts
+        return totals, averages
+
+    def analyze_hourly(self, payloads: Dict[str, Dict]) -> Dict[str, Dict[str, Any]]:
+        """Compute the AQI, heat-stress and stagnation outlook for many cities at once.
+
+        Every variable becomes one (city, hour) float32 array on the shared UTC
+        axis, and each rolling window is a single cumulative-sum pass over all
+        rows, so the cost is a handful of array operations per chunk of cities
+        rather than per hour. Tracks start at the current hour; the warm-up hours
+        before it only fill the windows.
+        """
+        payloads = {city_name: payload for city_name, payload in payloads.items()
+                    if payload and (payload.get("hourly") or {}).get("time")}
+        if not payloads:
+            return {}
+        
+        times = max((payload["hourly"]["time"] for payload in payloads.values()), key=len)
+        hours = len(times)
+        
+        def matrix(section: str, variable: str) -> np.ndarray:
+            values = np.full((len(payloads), hours), np.nan, dtype=np.float32)
+            for row, payload in enumerate(payloads.values()):
+                series = (payload.get(section) or {}).get(variable)
+                if series:
+                    values[row, :len(series)] = np.array(series[:hours], dtype=np.float32)
+            return values
+        
+        temperature = matrix("hourly", "temperature_2m")
+        humidity = matrix("hourly", "relative_humidity_2m")
+        precipitation = matrix("hourly", "precipitation")
+        wind = matrix("hourly", "wind_speed_10m")
+        ventilation = wind * matrix("hourly", "boundary_layer_height")
+        
+        heat_index = heat_index_celsius(temperature, humidity)
+        stagnant = (wind < STAGNATION_WIND_MS) & ~(precipitation > STAGNATION_MAX_PRECIPITATION_MM) & ~(ventilation >= VENTILATION_POOR)
+        stagnation = rolling_mean(np.where(np.isnan(wind), np.nan, stagnant.astype(np.float32)), 24)
+        
+        # Each pollutant's sub-index on its own averaging window; the AQI is the worst of them
+        averages, sub_indices = {}, {}
+        for pollutant, (window, concentrations, indices) in AQI_BREAKPOINTS.items():
+            values = matrix("air_quality", pollutant)
+            if pollutant == "ozone":
+                values = values / OZONE_UG_M3_PER_PPB
+            averages[pollutant] = rolling_mean(values, window)
+            present = ~np.isnan(averages[pollutant])
+            sub_indices[pollutant] = np.where(present, np.interp(np.where(present, averages[pollutant], 0), concentrations, indices), np.nan)
+        stacked = np.stack(list(sub_indices.values()))
+        measured = ~np.isnan(stacked).all(axis=0)
+        # Without pollutant data, a continuous version of the wind buckets: poor ventilation
+        # (or calm wind when the mixing height is unknown) scores 100, good dispersion 40
+        dispersion = np.where(np.isnan(ventilation), wind * 3.6 / 10 * VENTILATION_GOOD, ventilation)
+        estimate = np.interp(rolling_mean(dispersion, 24), [VENTILATION_POOR, VENTILATION_GOOD], [100, 40])
+        aqi = np.rint(np.where(measured, np.nanmax(np.where(measured, stacked, 0), axis=0), estimate))
         
-        if "surface_pressure_mean" in df.columns:
-             trends["avg_surface_pressure_hpa"] = round(df["surface_pressure_mean"].mean(), 1)
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:00")
+        start = min(max(bisect.bisect_left(times, now), 0), hours - 1)
+        track = slice(start, start + self.hourly_hours)
         
-        return trends
+        # Rounded once per array; only the conversion to JSON-ready lists is per city
+        def tracks(values: np.ndarray, digits: int) -> List[List[Optional[float]]]:
+            return [[None if value != value else value for value in row]
+                    for row in np.round(values[:, track].astype(np.float64), digits).tolist()]
+        
+        def current(values: np.ndarray, digits: int) -> List[Optional[float]]:
+            return [None if value != value else value
+                    for value in np.round(values[:, start].astype(np.float64), digits).tolist()]
+        
+        aqi_tracks = [[None if value is None else int(value) for value in row] for row in tracks(aqi, 0)]
+        heat_tracks = tracks(heat_index, 1)
+        peak_heat_tracks = tracks(rolling_max(heat_index, 24), 1)
+        stagnation_tracks = tracks(stagnation, 2)
+        factors = {
+            "pm2_5_24h_ug_m3": current(averages["pm2_5"], 1),
+            "pm10_24h_ug_m3": current(averages["pm10"], 1),
+            "ozone_8h_ppb": current(averages["ozone"], 1),
+            "ventilation_index_m2_s": current(ventilation, 0),
+            "stagnation_24h_fraction": current(stagnation, 2)
+        }
+        dominant = np.array(list(sub_indices))[np.argmax(np.nan_to_num(stacked[:, :, start], nan=-1), axis=0)]
+        heat_stress_hours = (heat_index[:, track] >= HEAT_STRESS_INDEX_C).sum(axis=1).tolist()
+        stagnant_hours = stagnant[:, track].sum(axis=1).tolist()
+        
+        results = {}
+        for row, city_name in enumerate(payloads):
+            aqi_track = aqi_tracks[row]
+            aqi_now = aqi_track[0]
+            peak = max((value for value in aqi_track if value is not None), default=None)
+            category = None if aqi_now is None else next(name for upper, name in AQI_CATEGORIES if aqi_now <= upper)
+            results[city_name] = {
+                "air_quality": {
+                    "estimated": not measured[row, start],
+                    "method": ("Open-Meteo air-quality forecast, US EPA AQI (24 h PM2.5/PM10, 8 h ozone)"
+                               if measured[row, start] else "Hourly ventilation estimate (24 h mean wind x mixing height)"),
+                    "factors": {factor: values[row] for factor, values in factors.items()},
+                    "dominant_pollutant": str(dominant[row]) if measured[row, start] else None,
+                    "estimated_aqi": aqi_now,
+                    "category": category,
+                    "health_recommendation": AQI_HEALTH_RECOMMENDATIONS.get(category)
+                },
+                "hourly_outlook": {
+                    "start": times[start],
+                    "hours": len(aqi_track),
+                    "aqi": aqi_track,
+                    "heat_index_c": heat_tracks[row],
+                    "heat_index_24h_max_c": peak_heat_tracks[row],
+                    "stagnation_24h_fraction": stagnation_tracks[row],
+                    "peak_aqi": peak,
+                    "peak_aqi_time": times[start + aqi_track.index(peak)] if peak is not None else None,
+                    "peak_heat_index_c": max((value for value in heat_tracks[row] if value is not None), default=None),
+                    "heat_stress_hours": heat_stress_hours[row],
+                    "stagnant_hours": stagnant_hours[row]
+                }
+            }
+        return results
 
     def estimate_air_quality_index(self, weather_data: Dict) -> Dict[str, Any]:
         """Estimate air quality based on weather and conditions"""
@@ -210,33 +2199,55 @@ class SyriaEnvironmentalDataAggregator:
 
     def analyze_drought_risk(self, precipitation_data: Dict) -> Dict[str, Any]:
         """Analyze drought risk based on precipitation data"""
-        drought_analysis = {}
+        return self.analyze_histories({"city": precipitation_data}).get("city", {}).get("drought_risk", {})
+
+    def classify_drought(self, annual_precipitation_mm: float) -> Dict[str, str]:
+        """Map annual precipitation to a drought risk level and climate classification"""
+        if annual_precipitation_mm < 300:
+            return {"drought_risk": "Very High", "classification": "Arid/Semi-arid"}
+        elif annual_precipitation_mm < 600:
+            return {"drought_risk": "High", "classification": "Semi-arid"}
+        else:
+            return {"drought_risk": "Moderate", "classification": "Sub-humid"}
+
+    def fetch_city_sources(self, city_info: Dict) -> Dict[str, Dict[str, Any]]:
+        """Fetch the current, historical and NASA POWER payloads for a city"""
+        fetched_at = {}
         
-        if "daily" in precipitation_data and "precipitation_sum" in precipitation_data["daily"]:
-            df = pd.DataFrame(precipitation_data["daily"])
-            df["date"] = pd.to_datetime(df["time"])
-            df["month"] = df["date"].dt.month
-            
-            monthly_rainfall = df.groupby("month")["precipitation_sum"].mean()
-            
-            dry_season_months = monthly_rainfall[monthly_rainfall < 20].index.tolist()
-            wet_season_months = monthly_rainfall[monthly_rainfall >= 20].index.tolist()
-            
-            drought_analysis["dry_season_months"] = dry_season_months
-            drought_analysis["wet_season_months"] = wet_season_months
-            drought_analysis["annual_precipitation_mm"] = round(monthly_rainfall.sum() * 30.44, 2)
-            
-            if drought_analysis["annual_precipitation_mm"] < 300:
-                drought_analysis["drought_risk"] = "Very High"
-                drought_analysis["classification"] = "Arid/Semi-arid"
-            elif drought_analysis["annual_precipitation_mm"] < 600:
-                drought_analysis["drought_risk"] = "High"
-                drought_analysis["classification"] = "Semi-arid"
-            else:
-                drought_analysis["drought_risk"] = "Moderate"
-                drought_analysis["classification"] = "Sub-humid"
+        print(f"Fetching current weather...")
+        current_weather = self.fetch_openmeteo_current_weather(
+            city_info["lat"], city_info["lon"]
+        )
+        fetched_at["current_weather"] = datetime.now().isoformat()
+        
+        print(f"Fetching historical weather ({self.climatology_years or 5} years)...")
+        fetch_history = self.fetch_climatology if self.climatology_years else self.fetch_openmeteo_historical_weather
+        historical_weather = fetch_history(
+            city_info["lat"], city_info["lon"]
+        )
+        fetched_at["historical_weather"] = datetime.now().isoformat()
         
-        return drought_analysis
+        print(f"Fetching NASA POWER climate data...")
+        nasa_power = self.fetch_nasa_power_climate(
+            city_info["lat"], city_info["lon"]
+        )
+        fetched_at["nasa_power"] = datetime.now().isoformat()
+        
+        sources = {
+            "current_weather": current_weather,
+            "historical_weather": historical_weather,
+            "nasa_power": nasa_power,
+            "fetched_at": fetched_at
+        }
+        
+        if self.hourly_hours:
+            print(f"Fetching hourly weather and air quality ({self.hourly_hours} hours)...")
+            sources["hourly"] = self.fetch_hourly(
+                city_info["lat"], city_info["lon"]
+            )
+            fetched_at["hourly"] = datetime.now().isoformat()
+        
+        return sources
 
     def process_city_data(self, city_name: str, city_info: Dict) -> Dict[str, Any]:
         """Process all environmental data for a city"""
@@ -244,40 +2255,43 @@ class SyriaEnvironmentalDataAggregator:
         print(f"Processing data for {city_name}...")
         print(f"{'='*60}")
         
+        sources = self.fetch_city_sources(city_info)
+        return self.analyze_city_data(city_name, city_info, sources)
+
+    def analyze_city_data(self, city_name: str, city_info: Dict, sources: Dict[str, Dict[str, Any]],
+                          history_analysis: Optional[Dict[str, Any]] = None,
+                          hourly_analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build a city's report entry from its fetched source payloads.
+
+        history_analysis and hourly_analysis are this city's entries from
+        analyze_histories and analyze_hourly; when omitted they are computed for
+        this city alone.
+        """
         city_data = {
             "coordinates": {
                 "latitude": city_info["lat"],
                 "longitude": city_info["lon"]
             },
-            "population": city_info["population"]
+            "population": city_info.get("population")
         }
         
-        print(f"Fetching current weather...")
-        current_weather = self.fetch_openmeteo_current_weather(
-            city_info["lat"], city_info["lon"]
-        )
-        time.sleep(0.5)  # Reduced sleep time
+        current_weather = sources["current_weather"]
+        historical_weather = sources["historical_weather"]
         
-        print(f"Fetching historical weather (5 years)...")
-        historical_weather = self.fetch_openmeteo_historical_weather(
-            city_info["lat"], city_info["lon"]
-        )
-        time.sleep(0.5)
+        if history_analysis is None:
+            print(f"Analyzing climate trends and drought risk...")
+            history_analysis = self.analyze_histories({city_name: historical_weather})[city_name]
+        climate_trends = history_analysis["climate_trends"]
+        drought_risk = history_analysis["drought_risk"]
         
-        print(f"Fetching NASA POWER climate data...")
-        nasa_power = self.fetch_nasa_power_climate(
-            city_info["lat"], city_info["lon"]
-        )
-        time.sleep(0.5)
-        
-        print(f"Analyzing climate trends...")
-        climate_trends = self.calculate_climate_trends(historical_weather)
-        
-        print(f"Estimating air quality...")
-        air_quality = self.estimate_air_quality_index(current_weather)
-        
-        print(f"Analyzing drought risk...")
-        drought_risk = self.analyze_drought_risk(historical_weather)
+        if hourly_analysis is None and sources.get("hourly"):
+            print(f"Computing hourly air quality and heat stress outlook...")
+            hourly_analysis = self.analyze_hourly({city_name: sources["hourly"]}).get(city_name)
+        if hourly_analysis:
+            air_quality = hourly_analysis["air_quality"]
+        else:
+            print(f"Estimating air quality...")
+            air_quality = self.estimate_air_quality_index(current_weather)
         
         if current_weather and "current" in current_weather:
             city_data["current_conditions"] = {
@@ -304,23 +2318,114 @@ class SyriaEnvironmentalDataAggregator:
         city_data["air_quality"] = air_quality
         city_data["drought_risk"] = drought_risk
         
-        if historical_weather and "daily" in historical_weather:
-            df = pd.DataFrame(historical_weather["daily"])
-            
-            city_data["historical_summary"] = {
-                "period_start": historical_weather["daily"]["time"][0] if "time" in historical_weather["daily"] else None,
-                "period_end": historical_weather["daily"]["time"][-1] if "time" in historical_weather["daily"] else None,
-                "avg_max_temp_c": round(df["temperature_2m_max"].mean(), 2) if "temperature_2m_max" in df.columns else None,
-                "avg_min_temp_c": round(df["temperature_2m_min"].mean(), 2) if "temperature_2m_min" in df.columns else None,
-                "total_precipitation_mm": round(df["precipitation_sum"].sum(), 2) if "precipitation_sum" in df.columns else None,
-                "max_wind_speed_kmh": round(df["wind_speed_10m_max"].max(), 2) if "wind_speed_10m_max" in df.columns else None,
-                "avg_surface_pressure_hpa": round(df["surface_pressure_mean"].mean(), 2) if "surface_pressure_mean" in df.columns else None
-            }
+        if "historical_summary" in history_analysis:
+            city_data["historical_summary"] = history_analysis["historical_summary"]
+        
+        if hourly_analysis:
+            city_data["hourly_outlook"] = hourly_analysis["hourly_outlook"]
         
         print(f"✓ Completed {city_name}")
         
         return city_data
 
+    def fetch_all_city_sources(self, cities: Dict[str, Dict], keys: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Fetch every city's source payloads concurrently on a bounded thread pool.
+
+        Each (city, endpoint) pair is its own task, so wall time is bounded by the
+        slowest request rather than the sum; per-host limits are enforced in http_get.
+        Tasks are queued alternating between endpoints, so the hosts are worked in
+        parallel rather than one after another.
+        With batch_size > 1 the Open-Meteo endpoints are fetched as one task per chunk
+        of cities, and the per-location results are split back out by position.
+        Cities that snap to the same model grid cell are fetched once and share
+        the payloads of the first city in that cell. keys limits the fetch to
+        some of the sources.
+        """
+        cells = {}
+        for city_name, city_info in cities.items():
+            cells.setdefault(self.grid_cell(city_info["lat"], city_info["lon"]), []).append(city_name)
+        members = {names[0]: names for names in cells.values()}
+        if len(members) < len(cities):
+            print(f"{len(cities)} locations share {len(members)} model grid cells")
+        cities = {city_name: cities[city_name] for city_name in members}
+
+        fetchers = {
+            "current_weather": self.fetch_openmeteo_current_weather,
+            "historical_weather": self.fetch_climatology if self.climatology_years else self.fetch_openmeteo_historical_weather,
+            "nasa_power": self.fetch_nasa_power_climate
+        }
+        if self.hourly_hours:
+            fetchers["hourly"] = self.fetch_hourly
+        fetchers = {key: fetch for key, fetch in fetchers.items() if keys is None or key in keys}
+        batch_fetchers = {
+            "current_weather": self.fetch_openmeteo_current_weather_batch,
+            "historical_weather": (self.fetch_climatology_batch if self.climatology_years
+                                   else self.fetch_openmeteo_historical_weather_batch),
+            "hourly": self.fetch_hourly_batch
+        } if self.batch_size > 1 else {}
+        
+        city_names = list(cities)
+        chunks = [city_names[i:i + self.batch_size] for i in range(0, len(city_names), self.batch_size)]
+        
+        print(f"Fetching data for {len(cities)} cities with {self.max_workers} workers (batch size {self.batch_size})...")
+        tasks = {}
+        for key, fetch in fetchers.items():
+            if key in batch_fetchers:
+                tasks[key] = [(batch_fetchers[key], ([(cities[name]["lat"], cities[name]["lon"]) for name in chunk],), chunk)
+                              for chunk in chunks]
+            else:
+                tasks[key] = [(fetch, (cities[city_name]["lat"], cities[city_name]["lon"]), city_name)
+                              for city_name in city_names]
+        
+        # Submitted round-robin across endpoints: queued one endpoint after another, the
+        # workers would all wait on one host's limits while the other hosts sat idle
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = {city_name: {} for city_name in city_names}
+        for round_tasks in zip_longest(*tasks.values()):
+            for key, task in zip(tasks, round_tasks):
+                if task is None:
+                    continue
+                fetch, args, target = task
+                future = executor.submit(self.timestamped, fetch, *args)
+                if isinstance(target, list):
+                    for index, city_name in enumerate(target):
+                        futures[city_name][key] = (future, index)
+                else:
+                    futures[target][key] = (future, None)
+        
+        results = {}
+        try:
+            for city_name, city_futures in futures.items():
+                try:
+                    sources = {"fetched_at": {}}
+                    for key, (future, index) in city_futures.items():
+                        payload, fetched_at = future.result()
+                        sources[key] = payload if index is None else payload[index]
+                        sources["fetched_at"][key] = fetched_at
+                except Exception as e:
+                    sources = e
+                for member in members[city_name]:
+                    results[member] = sources
+        except KeyboardInterrupt:
+            print(f"\n\nProcess interrupted by user. Saving partial data...")
+            self.interrupted = True
+            executor.shutdown(wait=False, cancel_futures=True)
+            return results
+        
+        executor.shutdown()
+        return results
+
+    def timestamped(self, fetch: Callable, *args) -> Tuple[Any, str]:
+        """Run a fetch and return its result with the time it completed"""
+        result = fetch(*args)
+        return result, datetime.now().isoformat()
+
+    def grid_cell(self, lat: float, lon: float) -> Tuple[float, float]:
+        """Model grid cell a point snaps to (the exact point when snapping is disabled)"""
+        if self.snap_resolution <= 0:
+            return (lat, lon)
+        return (round(lat / self.snap_resolution), round(lon / self.snap_resolution))
+
     def get_weather_description(self, code: int) -> str:
         """Convert weather code to description"""
         weather_codes = {
@@ -358,6 +2463,25 @@ class SyriaEnvironmentalDataAggregator:
             }
         }
 
+    def emit_city(self, city_name: str, city_data: Dict[str, Any]):
+        """Record a finished city: fold it into the summary inputs and store or stream it"""
+        if "drought_risk" in city_data and "drought_risk" in city_data["drought_risk"]:
+            risk = city_data["drought_risk"]["drought_risk"]
+            self.summary_inputs["drought_risks"][risk] = self.summary_inputs["drought_risks"].get(risk, 0) + 1
+        
+        if "climate_trends" in city_data and "temperature_trend_celsius" in city_data["climate_trends"]:
+            self.summary_inputs["temperature_trend_total"] += city_data["climate_trends"]["temperature_trend_celsius"]
+            self.summary_inputs["temperature_trend_count"] += 1
+        
+        self.cities_emitted += 1
+        with self.metrics.stage("write"):
+            for writer in self.extra_writers:
+                writer.write_city(city_name, city_data)
+            if self.writer.streaming:
+                self.writer.write_city(city_name, city_data)
+            else:
+                self.report_data["cities"][city_name] = city_data
+
     def generate_summary(self):
         """Generate overall summary"""
         print(f"\n{'='*60}")
@@ -365,28 +2489,21 @@ class SyriaEnvironmentalDataAggregator:
         print(f"{'='*60}")
         
         summary = {
-            "total_cities_analyzed": len(self.major_cities),
+            "total_cities_analyzed": self.location_count,
             "data_collection_date": datetime.now().isoformat(),
             "key_findings": [],
             "recommendations": []
         }
         
-        avg_drought_risk = []
-        avg_temp_trends = []
-        
-        for city_name, city_data in self.report_data["cities"].items():
-            if "drought_risk" in city_data and "drought_risk" in city_data["drought_risk"]:
-                avg_drought_risk.append(city_data["drought_risk"]["drought_risk"])
-            
-            if "climate_trends" in city_data and "temperature_trend_celsius" in city_data["climate_trends"]:
-                avg_temp_trends.append(city_data["climate_trends"]["temperature_trend_celsius"])
+        drought_risks = self.summary_inputs["drought_risks"]
+        temp_trend_count = self.summary_inputs["temperature_trend_count"]
         
-        if avg_drought_risk:
-            high_risk_count = avg_drought_risk.count("High") + avg_drought_risk.count("Very High")
-            summary["key_findings"].append(f"{high_risk_count}/{len(avg_drought_risk)} cities at high/very high drought risk")
+        if drought_risks:
+            high_risk_count = drought_risks.get("High", 0) + drought_risks.get("Very High", 0)
+            summary["key_findings"].append(f"{high_risk_count}/{sum(drought_risks.values())} cities at high/very high drought risk")
         
-        if avg_temp_trends:
-            avg_temp_change = round(sum(avg_temp_trends) / len(avg_temp_trends), 2)
+        if temp_trend_count:
+            avg_temp_change = round(self.summary_inputs["temperature_trend_total"] / temp_trend_count, 2)
             if avg_temp_change > 0:
                 summary["key_findings"].append(f"Average temperature increase of {avg_temp_change}°C over analysis period")
             else:
@@ -402,43 +2519,687 @@ class SyriaEnvironmentalDataAggregator:
         
         self.report_data["summary"] = summary
 
-    def run(self):
-        """Run the complete data aggregation process"""
-        print(f"\n{'#'*60}")
-        print(f"SYRIA ENVIRONMENTAL DATA AGGREGATION REPORT")
-        print(f"{'#'*60}")
-        print(f"Report Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"Cities to analyze: {list(self.major_cities.keys())}")
-        
-        self.add_country_level_analysis()
-        
+    def process_cities_serially(self):
+        """Fetch and analyze cities one at a time"""
+        resumed = self.resumable_results(self.major_cities)
         for city_name, city_info in self.major_cities.items():
+            if city_name in resumed:
+                self.emit_city(city_name, resumed[city_name])
+                continue
+            
             try:
-                city_data = self.process_city_data(city_name, city_info)
-                self.report_data["cities"][city_name] = city_data
+                print(f"\n{'='*60}")
+                print(f"Processing data for {city_name}...")
+                print(f"{'='*60}")
+                with self.metrics.stage("fetch"):
+                    sources = self.fetch_city_sources(city_info)
+                with self.metrics.stage("analysis"):
+                    city_data = self.analyze_city_data(city_name, city_info, sources)
+                self.emit_city(city_name, city_data)
+                if self.journal:
+                    self.journal.record(city_name, city_info, self.journal_status(sources), city_data, sources["fetched_at"])
             except KeyboardInterrupt:
                 print(f"\n\nProcess interrupted by user. Saving partial data...")
                 break
             except Exception as e:
                 print(f"Error processing {city_name}: {e}")
+                if self.journal:
+                    self.journal.record(city_name, city_info, "error")
                 continue
+            finally:
+                if self.journal:
+                    self.journal.flush()
+
+    def journal_status(self, sources: Dict[str, Any]) -> str:
+        """'ok' when every source returned data, 'partial' when one came back empty or skipped"""
+        payloads = [payload for key, payload in sources.items() if key != "fetched_at"]
+        return "ok" if all(payload and not payload.get("skipped") for payload in payloads) else "partial"
+
+    def resumable_results(self, cities: Dict[str, Dict]) -> Dict[str, Dict[str, Any]]:
+        """Journaled results to reuse instead of refetching, when resuming"""
+        if not (self.resume and self.journal):
+            return {}
+        resumed = self.journal.completed(cities, self.resume_max_age_hours * 3600)
+        if resumed:
+            print(f"Resuming: reusing {len(resumed)}/{len(cities)} journaled results")
+        return resumed
+
+    def process_cities_concurrently(self, cities: Optional[Dict[str, Dict]] = None):
+        """Fetch all cities in parallel (and/or batched), then analyze them in the original city order"""
+        cities = self.major_cities if cities is None else cities
+        resumed = self.resumable_results(cities)
+        with self.metrics.stage("fetch"):
+            all_sources = self.fetch_all_city_sources(
+                {city_name: city_info for city_name, city_info in cities.items() if city_name not in resumed}
+            )
+        
+        # Locations sharing a grid cell share one payload dict, so analyze each payload once
+        unique = {}
+        for city_name, sources in all_sources.items():
+            if not isinstance(sources, Exception):
+                unique.setdefault(id(sources), city_name)
+        print(f"Analyzing climate trends and drought risk for {len(unique)} locations...")
+        with self.metrics.stage("analysis"):
+            analysis = self.analyze_histories({
+                city_name: all_sources[city_name]["historical_weather"] for city_name in unique.values()
+            })
+            hourly_analysis = self.analyze_hourly({
+                city_name: all_sources[city_name].get("hourly") for city_name in unique.values()
+            })
+        
+        try:
+            for city_name, city_info in cities.items():
+                if city_name in resumed:
+                    self.emit_city(city_name, resumed[city_name])
+                    continue
+                if city_name not in all_sources:
+                    break
+                
+                sources = all_sources[city_name]
+                if isinstance(sources, Exception):
+                    print(f"Error processing {city_name}: {sources}")
+                    if self.journal:
+                        self.journal.record(city_name, city_info, "error")
+                    continue
+                
+                print(f"\n{'='*60}")
+                print(f"Processing data for {city_name}...")
+                print(f"{'='*60}")
+                try:
+                    with self.metrics.stage("analysis"):
+                        city_data = self.analyze_city_data(city_name, city_info, sources, analysis[unique[id(sources)]],
+                                                           hourly_analysis.get(unique[id(sources)]))
+                    self.emit_city(city_name, city_data)
+                    if self.journal:
+                        self.journal.record(city_name, city_info, self.journal_status(sources), city_data, sources["fetched_at"])
+                except Exception as e:
+                    print(f"Error processing {city_name}: {e}")
+                    if self.journal:
+                        self.journal.record(city_name, city_info, "error")
+                    continue
+        finally:
+            if self.journal:
+                self.journal.flush()
+
+    def iter_locations(self) -> Iterator[Tuple[str, Dict]]:
+        """Locations to analyze: the configured source, or the governorate centres"""
+        if self.location_source is None:
+            return iter(self.major_cities.items())
+        return self.location_source()
+
+    def process_location_chunks(self):
+        """Stream locations from the source in chunks of chunk_size, so only one chunk of raw history is held at a time"""
+        locations = self.iter_locations()
+        self.location_count = 0
+        while not self.interrupted:
+            chunk = dict(islice(locations, self.chunk_size))
+            if not chunk:
+                break
+            self.location_count += len(chunk)
+            print(f"\nProcessing locations {self.location_count - len(chunk) + 1}-{self.location_count}...")
+            self.process_cities_concurrently(chunk)
+        self.report_data["metadata"]["cities_analyzed"] = self.location_count
+
+    def run(self):
+        """Run the complete data aggregation process"""
+        print(f"\n{'#'*60}")
+        print(f"SYRIA ENVIRONMENTAL DATA AGGREGATION REPORT")
+        print(f"{'#'*60}")
+        print(f"Report Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        if self.location_source is None:
+            print(f"Cities to analyze: {list(self.major_cities.keys())}")
+        if self.shard is not None:
+            print(f"Shard {self.shard[0]} of {self.shard[1]} (by {self.shard_by})")
         
-        self.generate_summary()
+        # Country-level data is the same for every shard; the first one fetches it for the merge
+        if self.shard is None or self.shard[0] == 0:
+            with self.metrics.stage("country_level"):
+                self.add_country_level_analysis()
         
-        output_file = "syria_environmental_data_report.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.report_data, f, indent=2, ensure_ascii=False)
+        if self.location_source is not None:
+            # Not known until the source is exhausted; streamed headers carry null
+            self.report_data["metadata"]["cities_analyzed"] = None
+        
+        writers = [self.writer] + self.extra_writers
+        for writer in writers:
+            writer.open(self.report_data)
+        try:
+            if self.location_source is not None:
+                self.process_location_chunks()
+            elif self.max_workers > 1 or self.batch_size > 1:
+                self.process_cities_concurrently()
+            else:
+                self.process_cities_serially()
+            
+            with self.metrics.stage("summary"):
+                self.generate_summary()
+            with self.metrics.stage("write"):
+                for writer in writers:
+                    writer.close(self.report_data)
+                    writer.publish()
+        except BaseException:
+            for writer in writers:
+                writer.abort()
+            raise
+        
+        if self.cache:
+            self.cache.evict()
         
         print(f"\n{'#'*60}")
         print(f"✓ REPORT COMPLETE")
         print(f"{'#'*60}")
-        print(f"Output file: {output_file}")
-        print(f"Total cities analyzed: {len(self.report_data['cities'])}")
-        print(f"File size: {len(json.dumps(self.report_data))} bytes")
+        print(f"Output file: {self.writer.path}")
+        print(f"Total cities analyzed: {self.cities_emitted}")
+        print(f"File size: {self.writer.size} bytes")
+        for writer in self.extra_writers:
+            print(f"{writer.label}: {writer.path} ({writer.size} bytes)")
+        if self.cache:
+            self.cache.print_report()
+        self.transport.print_report()
         print(f"{'#'*60}\n")
         
+        self.write_metrics()
         return self.report_data
 
+    def merge_shards(self, paths: List[str]):
+        """Combine shard reports into this aggregator's report and summarize the whole set once.
+
+        Shards are streamed city by city into the configured writers, so the merge
+        holds no more than a single-process run would. Cities appear shard by shard.
+        """
+        print(f"\n{'#'*60}")
+        print(f"MERGING {len(paths)} SHARD REPORTS")
+        print(f"{'#'*60}")
+        
+        country_level, count = None, 0
+        for path in paths:
+            for record in iter_report_records(path):
+                if record["type"] == "country_level" and country_level is None:
+                    country_level = record["data"]
+                elif record["type"] == "city":
+                    count += 1
+        
+        self.reset_report(count)
+        if country_level is not None:
+            self.report_data["country_level"] = country_level
+        writers = [self.writer] + self.extra_writers
+        for writer in writers:
+            writer.open(self.report_data)
+        try:
+            with self.metrics.stage("write"):
+                for path in paths:
+                    for record in iter_report_records(path):
+                        if record["type"] == "city":
+                            self.emit_city(record["name"], record["data"])
+            with self.metrics.stage("summary"):
+                self.generate_summary()
+            with self.metrics.stage("write"):
+                for writer in writers:
+                    writer.close(self.report_data)
+                    writer.publish()
+        except BaseException:
+            for writer in writers:
+                writer.abort()
+            raise
+        
+        print(f"Output file: {self.writer.path} ({self.writer.size} bytes)")
+        print(f"Total cities merged: {self.cities_emitted}")
+        for writer in self.extra_writers:
+            print(f"{writer.label}: {writer.path} ({writer.size} bytes)")
+        self.write_metrics()
+        return self.report_data
+
+    def write_metrics(self):
+        """Write the run's metrics JSON and Prometheus textfile, where configured"""
+        extra = {"locations_total": self.cities_emitted, "report_bytes": self.writer.size}
+        if self.cache:
+            extra.update({f"cache_{key}": value for key, value in self.cache.stats.items()})
+        if self.metrics_output:
+            self.metrics.write_json(self.metrics_output, **extra)
+        if self.prometheus_output:
+            self.metrics.write_prometheus(self.prometheus_output, **extra)
+
+
+class ReportDaemon:
+    """Keeps the report current by refreshing each source on its own interval.
+
+    Every poll re-reads the location source, so added or removed locations are
+    picked up without a restart. Sources whose interval has elapsed are refetched
+    (through the cache, so archives only download their new tail) in chunks of the
+    aggregator's chunk_size. The report is rebuilt and atomically replaced only
+    when a fetched payload that feeds it differs from the one already held.
+    Historical and hourly payloads are reduced to their analysis on arrival, so
+    only small per-location state is kept between polls.
+    """
+
+    def __init__(self, aggregator: SyriaEnvironmentalDataAggregator,
+                 intervals: Optional[Dict[str, float]] = None, poll_seconds: float = 60):
+        self.aggregator = aggregator
+        self.intervals = {**DEFAULT_REFRESH_INTERVALS, **(intervals or {})}
+        self.poll_seconds = poll_seconds
+        self.cities = {}
+        self.current_weather = {}
+        self.history_analysis = {}
+        self.hourly_analysis = {}
+        self.country_level = None
+        self.digests = {}
+        self.refreshed_at = {}
+        self.stopping = threading.Event()
+
+    def digest(self, payload: Any) -> str:
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def due(self, key: Any, source: str, now: float) -> bool:
+        refreshed = self.refreshed_at.get(key)
+        return refreshed is None or now - refreshed >= self.intervals[source]
+
+    def update(self, key: Any, payload: Any) -> bool:
+        """Remember a payload's digest; True when it differs from the previous one"""
+        digest = self.digest(payload)
+        if self.digests.get(key) == digest:
+            return False
+        self.digests[key] = digest
+        return True
+
+    def sync_locations(self) -> bool:
+        """Re-read the location source; True when locations were added, removed or moved"""
+        cities = dict(self.aggregator.iter_locations())
+        if cities == self.cities:
+            return False
+        
+        removed = self.cities.keys() - cities.keys()
+        moved = {name for name in cities.keys() & self.cities.keys() if cities[name] != self.cities[name]}
+        for city_name in removed | moved:
+            self.current_weather.pop(city_name, None)
+            self.history_analysis.pop(city_name, None)
+            self.hourly_analysis.pop(city_name, None)
+            for source in ("current_weather", "historical_weather", "nasa_power", "hourly"):
+                self.refreshed_at.pop((city_name, source), None)
+                self.digests.pop((city_name, source), None)
+        print(f"Locations: {len(cities)} ({len(cities.keys() - self.cities.keys())} added, {len(removed)} removed)")
+        self.cities = cities
+        return True
+
+    def poll(self) -> bool:
+        """Refresh every source that is due; True when the report needs rewriting"""
+        aggregator = self.aggregator
+        changed = self.sync_locations()
+        now = time.monotonic()
+        
+        if self.due("world_bank", "world_bank", now):
+            with aggregator.metrics.stage("country_level"):
+                aggregator.add_country_level_analysis()
+            self.country_level = aggregator.report_data["country_level"]
+            self.refreshed_at["world_bank"] = now
+            changed |= self.update("world_bank", self.country_level)
+        
+        refreshed = ("current_weather", "historical_weather", "nasa_power") + (("hourly",) if aggregator.hourly_hours else ())
+        for source in refreshed:
+            due = [city_name for city_name in self.cities if self.due((city_name, source), source, now)]
+            if not due:
+                continue
+            print(f"Refreshing {source} for {len(due)} locations...")
+            # Fetched in chunks like process_location_chunks, so one chunk of raw payloads is held at a time
+            pending = iter(due)
+            while True:
+                chunk = {city_name: self.cities[city_name] for city_name in islice(pending, aggregator.chunk_size)}
+                if not chunk:
+                    break
+                changed |= self.refresh_chunk(source, chunk, now)
+        
+        return changed
+
+    def refresh_chunk(self, source: str, chunk: Dict[str, Dict], now: float) -> bool:
+        """Refetch one source for a chunk of locations; True when a payload feeding the report changed"""
+        aggregator = self.aggregator
+        with aggregator.metrics.stage("fetch"):
+            fetched = aggregator.fetch_all_city_sources(chunk, keys=[source])
+        if aggregator.interrupted:
+            raise KeyboardInterrupt
+        
+        changed = False
+        histories, hourly = {}, {}
+        for city_name, sources in fetched.items():
+            if isinstance(sources, Exception):
+                print(f"Error refreshing {source} for {city_name}: {sources}")
+                continue
+            self.refreshed_at[(city_name, source)] = now
+            payload = sources[source]
+            if not payload or payload.get("skipped") or not self.update((city_name, source), payload):
+                continue
+            if source == "current_weather":
+                self.current_weather[city_name] = payload
+                changed = True
+            elif source == "historical_weather":
+                histories[city_name] = payload
+                changed = True
+            elif source == "hourly":
+                hourly[city_name] = payload
+                changed = True
+            # NASA POWER is refreshed to keep the cache warm but does not feed the report
+        
+        if histories:
+            with aggregator.metrics.stage("analysis"):
+                self.history_analysis.update(aggregator.analyze_histories(histories))
+        if hourly:
+            with aggregator.metrics.stage("analysis"):
+                self.hourly_analysis.update(aggregator.analyze_hourly(hourly))
+        return changed
+
+    def write_report(self):
+        """Rebuild the report from the held state and atomically replace the previous one"""
+        aggregator = self.aggregator
+        aggregator.reset_report(len(self.cities))
+        aggregator.report_data["country_level"] = self.country_level
+        aggregator.make_writers(atomic=True)
+        writers = [aggregator.writer] + aggregator.extra_writers
+        for writer in writers:
+            writer.open(aggregator.report_data)
+        try:
+            empty = {"climate_trends": {}, "drought_risk": {}}
+            for city_name, city_info in self.cities.items():
+                sources = {"current_weather": self.current_weather.get(city_name, {}), "historical_weather": {}}
+                with aggregator.metrics.stage("analysis"):
+                    city_data = aggregator.analyze_city_data(
+                        city_name, city_info, sources, self.history_analysis.get(city_name, empty),
+                        self.hourly_analysis.get(city_name)
+                    )
+                aggregator.emit_city(city_name, city_data)
+            with aggregator.metrics.stage("summary"):
+                aggregator.generate_summary()
+            with aggregator.metrics.stage("write"):
+                for writer in writers:
+                    writer.close(aggregator.report_data)
+                    writer.publish()
+        except BaseException:
+            for writer in writers:
+                writer.abort()
+            raise
+
+    def run(self):
+        """Poll until interrupted or sent SIGTERM"""
+        print(f"Daemon mode: polling every {self.poll_seconds:g}s; refresh intervals "
+              + ", ".join(f"{source} {seconds / 60:g} min" for source, seconds in self.intervals.items()))
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stopping.set())
+        try:
+            while not self.stopping.is_set():
+                try:
+                    if self.poll():
+                        self.write_report()
+                        print(f"Report updated: {self.aggregator.writer.target} "
+                              f"({len(self.cities)} locations, {self.aggregator.writer.size} bytes)")
+                        self.aggregator.write_metrics()
+                    if self.aggregator.cache:
+                        self.aggregator.cache.evict()
+                except KeyboardInterrupt:
+                    raise
+                except Exception as e:
+                    print(f"Refresh failed, retrying next poll: {e}")
+                self.stopping.wait(self.poll_seconds)
+        except KeyboardInterrupt:
+            print("\nInterrupted")
+        print("Daemon stopped")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Aggregate environmental data for Syrian cities")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of concurrent fetch workers (1 = serial)")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Locations per Open-Meteo request (1 = one request per city)")
+    parser.add_argument("--host-limit", action="append", default=[], metavar="HOST=CONCURRENCY:RATE",
+                        help="Override per-host in-flight and requests/second limits (repeatable)")
+    parser.add_argument("--climatology-years", type=int, metavar="N",
+                        help=f"Analyze the last N complete years (30-70; the archive starts in {OPENMETEO_ARCHIVE_FIRST_YEAR}) "
+                             "in parallel year chunks instead of the last 5 years")
+    parser.add_argument("--climatology-chunk-years", type=int, default=5,
+                        help="Years per archive request in climatology mode")
+    parser.add_argument("--hourly-outlook", type=int, nargs="?", const=72, metavar="HOURS",
+                        help="Fetch hourly weather and air quality and add 24-72 hour AQI, heat index and "
+                             "stagnation tracks, replacing the single-reading air quality estimate (default 72 hours)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep running, refreshing each source on its own interval and rewriting the report when it changes")
+    parser.add_argument("--poll-seconds", type=float, default=60,
+                        help="Daemon mode: how often to check for due sources and new locations")
+    parser.add_argument("--refresh-interval", action="append", default=[], metavar="SOURCE=MINUTES",
+                        help="Daemon mode: override a source's refresh interval; sources: "
+                             + ", ".join(DEFAULT_REFRESH_INTERVALS) + " (repeatable)")
+    parser.add_argument("--shard", metavar="INDEX/COUNT",
+                        help="Process only shard INDEX (0-based) of COUNT; write --output-format jsonl for merging")
+    parser.add_argument("--shard-by", choices=["hash", "region"], default="hash",
+                        help="Assign locations to shards by name hash or by 1-degree region tile")
+    parser.add_argument("--shards", type=int, metavar="N",
+                        help="Run N shard processes locally, then merge them into --output")
+    parser.add_argument("--shard-dir", default="syria_environmental_shards",
+                        help="Where --shards writes shard reports and logs")
+    parser.add_argument("--merge", nargs="+", metavar="PATH",
+                        help="Merge shard reports into --output instead of fetching")
+    parser.add_argument("--base-url", action="append", default=[], metavar="HOST=URL",
+                        help="Send requests for HOST to URL instead, e.g. a local mock server (repeatable)")
+    locations = parser.add_mutually_exclusive_group()
+    locations.add_argument("--locations-csv", metavar="PATH",
+                           help="CSV of locations (name + lat/lon, or governorate names as in population.csv)")
+    locations.add_argument("--locations-geojson", metavar="PATH",
+                           help="GeoJSON of districts; one location per feature centroid")
+    locations.add_argument("--grid", type=float, metavar="DEGREES",
+                           help="Regular lat/lon grid over Syria at this resolution")
+    parser.add_argument("--grid-boundary", metavar="PATH",
+                        help="GeoJSON boundary used to clip and name --grid points")
+    parser.add_argument("--chunk-size", type=int, default=500,
+                        help="Locations fetched and analyzed per chunk (bounds memory)")
+    parser.add_argument("--snap-resolution", type=float, default=0.1,
+                        help="Model grid cell size in degrees; locations in one cell share a fetch (0 = off)")
+    parser.add_argument("--output", default="syria_environmental_data_report.json",
+                        help="Report output path")
+    parser.add_argument("--output-format", choices=sorted(REPORT_WRITERS), default="json",
+                        help="json: written at the end; json-stream: same document written city by city; "
+                             "jsonl: one record per line")
+    parser.add_argument("--compact-output", metavar="PATH",
+                        help="Also write a packed columnar JSON for the frontend map")
+    parser.add_argument("--compact-compression", nargs="*", choices=["gzip", "brotli"], default=[],
+                        help="Pre-compressed copies of the compact output to write alongside it")
+    parser.add_argument("--surface-output", metavar="PATH",
+                        help="Also write inverse-distance interpolated surfaces: a binary grid at PATH, "
+                             "a PATH.json manifest and tiles")
+    parser.add_argument("--surface-metrics", nargs="+", choices=SURFACE_METRIC_CHOICES, default=SURFACE_METRICS,
+                        help="Metrics to interpolate")
+    parser.add_argument("--surface-resolution", type=float, default=SURFACE_RESOLUTION,
+                        help="Surface grid cell size in degrees")
+    parser.add_argument("--surface-boundary", metavar="PATH",
+                        help="GeoJSON boundary; surface cells outside it are left empty")
+    parser.add_argument("--journal", default="syria_environmental_journal.sqlite",
+                        help="SQLite journal of per-city results, written as each city completes")
+    parser.add_argument("--no-journal", action="store_true",
+                        help="Do not journal per-city results")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse journaled results and only redo failed, stale or missing cities")
+    parser.add_argument("--resume-max-age-hours", type=float, default=24,
+                        help="Journaled results older than this are redone when resuming")
+    parser.add_argument("--metrics-output", metavar="PATH",
+                        help="Write stage timings and per-endpoint request/byte/decode counters as JSON")
+    parser.add_argument("--prometheus-output", metavar="PATH",
+                        help="Write the same metrics as a Prometheus textfile for node exporter")
+    parser.add_argument("--profile", nargs="?", const="syria_environmental_profile.txt", metavar="PATH",
+                        help="Run under cProfile and tracemalloc and write a report")
+    parser.add_argument("--max-retries", type=int, default=3,
+                        help="Retries per request on 429/5xx responses and connection errors")
+    parser.add_argument("--cache", default="syria_environmental_cache.sqlite",
+                        help="SQLite cache file for archive and NASA POWER responses")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always download the full historical ranges")
+    parser.add_argument("--cache-ttl-days", type=float, default=30,
+                        help="Re-download cached histories older than this many days")
+    parser.add_argument("--cache-max-mb", type=int, default=512,
+                        help="Evict least recently used cache entries beyond this size")
+    return parser.parse_args(argv)
+
+
+def location_source_from_args(args: argparse.Namespace) -> Optional[Callable[[], Iterator[Tuple[str, Dict]]]]:
+    """Build the location source factory selected on the command line, if any"""
+    if args.locations_csv:
+        return partial(csv_locations, args.locations_csv, MAJOR_CITIES)
+    if args.locations_geojson:
+        return partial(geojson_locations, args.locations_geojson)
+    if args.grid:
+        return partial(grid_locations, args.grid, args.grid_boundary)
+    return None
+
+
+def parse_host_limits(specs: List[str]) -> Dict[str, Dict[str, float]]:
+    """Parse HOST=CONCURRENCY:RATE overrides into a host limits dict"""
+    host_limits = {}
+    for spec in specs:
+        host, _, limits = spec.partition("=")
+        concurrency, _, rate = limits.partition(":")
+        host_limits[host] = {
+            "concurrency": int(concurrency),
+            "rate": float(rate) if rate else float(concurrency),
+            "burst": int(concurrency)
+        }
+    return host_limits
+
+
+def parse_refresh_intervals(specs: List[str]) -> Dict[str, float]:
+    """Parse SOURCE=MINUTES overrides into a source to seconds dict"""
+    intervals = {}
+    for spec in specs:
+        source, _, minutes = spec.partition("=")
+        if source not in DEFAULT_REFRESH_INTERVALS:
+            raise ValueError(f"Unknown source {source!r}; expected one of {', '.join(DEFAULT_REFRESH_INTERVALS)}")
+        intervals[source] = float(minutes) * 60
+    return intervals
+
+
+def parse_base_urls(specs: List[str]) -> Dict[str, str]:
+    """Parse HOST=URL overrides into a host to base URL dict"""
+    return dict(spec.split("=", 1) for spec in specs)
+
+
+def parse_shard(spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse INDEX/COUNT into a shard tuple"""
+    if not spec:
+        return None
+    index, _, count = spec.partition("/")
+    if not 0 <= int(index) < int(count):
+        raise ValueError(f"Shard index must be in 0..{int(count) - 1}, got {spec}")
+    return int(index), int(count)
+
+
+def parse_hourly_hours(hours: Optional[int]) -> Optional[int]:
+    """Validate the --hourly-outlook track length"""
+    if hours is not None and not 24 <= hours <= 72:
+        raise ValueError(f"Hourly outlook must cover 24-72 hours, got {hours}")
+    return hours
+
+
+def parse_climatology_years(years: Optional[int]) -> Optional[int]:
+    """Validate the --climatology-years baseline length"""
+    if years is not None and not 30 <= years <= 70:
+        raise ValueError(f"Climatology baseline must cover 30-70 years, got {years}")
+    return years
+
+
+def build_aggregator(args: argparse.Namespace) -> SyriaEnvironmentalDataAggregator:
+    """Construct the aggregator configured on the command line"""
+    return SyriaEnvironmentalDataAggregator(
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+        max_retries=args.max_retries,
+        location_source=location_source_from_args(args),
+        chunk_size=args.chunk_size,
+        snap_resolution=args.snap_resolution,
+        output_file=args.output,
+        output_format=args.output_format,
+        compact_output=args.compact_output,
+        compact_compression=args.compact_compression,
+        surface_output=args.surface_output,
+        surface_metrics=args.surface_metrics,
+        surface_resolution=args.surface_resolution,
+        surface_boundary=args.surface_boundary,
+        hourly_hours=parse_hourly_hours(args.hourly_outlook),
+        journal=None if args.no_journal else RunJournal(args.journal),
+        resume=args.resume,
+        resume_max_age_hours=args.resume_max_age_hours,
+        metrics_output=args.metrics_output,
+        prometheus_output=args.prometheus_output,
+        base_urls=parse_base_urls(args.base_url),
+        climatology_years=parse_climatology_years(args.climatology_years),
+        climatology_chunk_years=args.climatology_chunk_years,
+        cache=None if args.no_cache else ResponseCache(
+            args.cache, ttl_days=args.cache_ttl_days, max_bytes=args.cache_max_mb * 1024 * 1024
+        ),
+        host_limits=parse_host_limits(args.host_limit),
+        shard=parse_shard(args.shard),
+        shard_by=args.shard_by
+    )
+
+
+def run_shard(args: argparse.Namespace, log_path: str):
+    """Worker process for --shards: run one shard with its own output, journal and cache files"""
+    with open(log_path, "w", encoding="utf-8") as log:
+        sys.stdout = sys.stderr = log
+        build_aggregator(args).run()
+
+
+def run_local_shards(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run --shards worker processes, then merge their reports into the configured output"""
+    os.makedirs(args.shard_dir, exist_ok=True)
+    # Each process throttles on its own, so the per-host budget is split between them
+    host_limits = {**DEFAULT_HOST_LIMITS, **parse_host_limits(args.host_limit)}
+    shard_host_limits = [
+        f"{host}={max(1, int(limit['concurrency']) // args.shards)}:{limit['rate'] / args.shards}"
+        for host, limit in host_limits.items()
+    ]
+    context = multiprocessing.get_context("spawn")
+    processes, paths = [], []
+    for index in range(args.shards):
+        path = os.path.join(args.shard_dir, f"shard-{index:03d}-of-{args.shards:03d}.jsonl")
+        shard_args = argparse.Namespace(**{
+            **vars(args),
+            "shard": f"{index}/{args.shards}",
+            "output": path,
+            "output_format": "jsonl",
+            "compact_output": None,
+            "surface_output": None,
+            "metrics_output": None,
+            "prometheus_output": None,
+            "host_limit": shard_host_limits,
+            # SQLite files are per shard so workers never contend for one database lock;
+            # assignment is stable, so each shard finds its own cache and journal next run
+            "journal": shard_path(args.journal, index),
+            "cache": shard_path(args.cache, index)
+        })
+        process = context.Process(target=run_shard, args=(shard_args, path[:-len(".jsonl")] + ".log"))
+        process.start()
+        processes.append(process)
+        paths.append(path)
+    print(f"Started {args.shards} shard processes; logs in {args.shard_dir}")
+    
+    for index, process in enumerate(processes):
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"Shard {index} failed (exit code {process.exitcode}); see its log in {args.shard_dir}")
+    
+    return merge_aggregator(args).merge_shards(paths)
+
+
+def merge_aggregator(args: argparse.Namespace) -> SyriaEnvironmentalDataAggregator:
+    """Aggregator that only merges shard reports: no fetching, so no journal or cache"""
+    return build_aggregator(argparse.Namespace(**{**vars(args), "shard": None, "no_journal": True, "no_cache": True}))
+
+
 if __name__ == "__main__":
-    aggregator = SyriaEnvironmentalDataAggregator()
-    report = aggregator.run()
+    args = parse_args()
+    if args.shards:
+        report = run_local_shards(args)
+    elif args.merge:
+        report = merge_aggregator(args).merge_shards(args.merge)
+    else:
+        aggregator = build_aggregator(args)
+        if args.daemon:
+            ReportDaemon(aggregator, parse_refresh_intervals(args.refresh_interval), args.poll_seconds).run()
+        elif args.profile:
+            report = run_with_profile(aggregator, args.profile)
+        else:
+            report = aggregator.run()